@@ -0,0 +1,156 @@
+"""Offline extraction benchmark.
+
+Runs every extractor, and the ScraperPipeline extract -> dedupe -> save path, over synthetic
+search-result pages and reports pages/sec, cards/sec, peak RSS and a per-field time breakdown.
+Each scenario runs in a fresh process so peak RSS is per scenario.
+
+    python -m benchmarks.bench_extraction                       # compare with benchmarks/baseline.json
+    python -m benchmarks.bench_extraction --save-baseline       # record a new baseline
+
+Throughput depends on the machine, so no baseline is committed: the first run on a machine
+records benchmarks/baseline.json, and later runs are compared with it.
+    python -m benchmarks.bench_extraction --pages 1 100 1000 10000 --cards 10 50 200
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks import fixtures
+
+RETAILERS = ["amazon.de", "meds.se"]
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _field_breakdown(extractor, html_pages):
+    """Time each field of the extractor spec separately over all cards of the given pages, in ms per page."""
+    spec = extractor.spec
+    timings = {field.name: 0.0 for field in spec.fields}
+    cards = [card for html in html_pages for card in spec.card_xpath(extractor.parse_document(html))]
+    for card in cards:
+        values = {}
+        for field in spec.selector_fields:
+            start = time.perf_counter()
+            value = next((m[0] for m in (xpath(card) for xpath in field.xpaths) if m and m[0]), None)
+            if value is not None and field.post is not None:
+                value = field.post(value)
+            values[field.name] = value
+            timings[field.name] += time.perf_counter() - start
+        for field in spec.computed_fields:
+            start = time.perf_counter()
+            values[field.name] = field.compute(values)
+            timings[field.name] += time.perf_counter() - start
+    return {name: round(seconds * 1000 / len(html_pages), 3) for name, seconds in timings.items()}
+
+
+def run_scenario(stage, retailer, cards_per_page, page_count):
+    """Run one scenario and return its measurements (called in a child process)."""
+    from src.pipeline import ScraperPipeline
+
+    scraped_pages = fixtures.pages(retailer, cards_per_page, page_count)
+    workdir = tempfile.mkdtemp(prefix="pricescrapper-bench-")
+    os.chdir(workdir)
+    pipeline = ScraperPipeline(retailer_url=retailer, config={"Brand": "BIBS", "Category": "Bench"})
+
+    start = time.perf_counter()
+    if stage == "extract":
+        products = [p for page in scraped_pages for p in pipeline.extractor.parse_products(page["html"], pipeline.base_http_url)]
+        rows = len(products)
+    else:
+        df = pipeline.extract_data(scraped_pages)
+        df = pipeline.post_process(df)
+        pipeline.save_results(df)
+        rows = len(df)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "stage": stage,
+        "retailer": retailer,
+        "cards_per_page": cards_per_page,
+        "pages": page_count,
+        "rows": rows,
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(page_count / elapsed, 2),
+        "cards_per_sec": round(page_count * cards_per_page / elapsed, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+    if stage == "extract":
+        sample = [page["html"] for page in scraped_pages[:20]]
+        result["field_ms_per_page"] = _field_breakdown(pipeline.extractor, sample)
+
+    os.chdir(tempfile.gettempdir())
+    shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def scenario_key(result):
+    return f"{result['stage']}:{result['retailer']}:{result['cards_per_page']}x{result['pages']}"
+
+
+def compare(results, baseline, tolerance):
+    """Return the scenarios whose throughput dropped by more than `tolerance` versus the baseline."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(scenario_key(result))
+        if previous and result["pages_per_sec"] < previous["pages_per_sec"] * (1 - tolerance):
+            regressions.append((scenario_key(result), previous["pages_per_sec"], result["pages_per_sec"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline extraction benchmark")
+    parser.add_argument("--cards", type=int, nargs="+", default=[10, 50, 200], help="cards per page")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100], help="pages per run")
+    parser.add_argument("--stages", nargs="+", default=["extract", "pipeline"], choices=["extract", "pipeline"])
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed pages/sec drop before flagging")
+    args = parser.parse_args(argv)
+
+    # A fresh interpreter per scenario, so peak RSS and caches don't leak between scenarios
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for stage in args.stages:
+        for retailer in RETAILERS:
+            for cards_per_page in args.cards:
+                for page_count in args.pages:
+                    with context.Pool(1) as pool:
+                        result = pool.apply(run_scenario, (stage, retailer, cards_per_page, page_count))
+                    results.append(result)
+                    print(f"{scenario_key(result):<32} {result['pages_per_sec']:>10} pages/s "
+                          f"{result['cards_per_sec']:>12} cards/s {result['peak_rss_mb']:>8} MB peak")
+                    if "field_ms_per_page" in result:
+                        fields = ", ".join(f"{k}={v}" for k, v in result["field_ms_per_page"].items())
+                        print(f"{'':<32} field ms / page: {fields}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        if not args.save_baseline:
+            print("ℹ️ No baseline found, these results become the baseline of this machine.")
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({scenario_key(r): r for r in results}, f, indent=4)
+        print(f"📁 Baseline saved to: {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for key, before, after in regressions:
+        print(f"❌ Regression in {key}: {before} -> {after} pages/s")
+    if not regressions:
+        print("✅ No regressions against baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Synthetic, anonymized search-result pages for offline extraction benchmarks.
+
+The markup mirrors the structure the extractors rely on (card containers, price parts,
+ratings, sponsored cards without whole/fraction prices, cards without a title) with
+made-up products, so no real retailer data is shipped.
+"""
+import random
+
+PRODUCT_WORDS = ["Pacifier", "Box", "Bottle", "Teether", "Clip", "Bib", "Natural", "Rubber", "Silicone", "Ivory",
+                 "Sage", "Blush", "Mint", "Classic", "Colour", "Supreme", "Baby", "Night", "Day", "Set"]
+
+
+def _title(rng):
+    return "BIBS " + " ".join(rng.choice(PRODUCT_WORDS) for _ in range(rng.randint(3, 9)))
+
+
+def _amazon_card(rng, index):
+    asin = f"B0{rng.randrange(16 ** 8):08X}"
+    title = _title(rng)
+    whole, fraction = rng.randint(3, 99), rng.randint(0, 99)
+    kind = rng.random()
+    if kind < 0.05:
+        # Placeholder card without any title, skipped by the extractor
+        return f'<div data-component-type="s-search-result" data-index="{index}"><img src="/img/{asin}.jpg"></div>'
+    if kind < 0.2:
+        # Sponsored card: aria-label title, off-screen price only
+        return (f'<div data-component-type="s-search-result" data-index="{index}">'
+                f'<h2><a aria-label="{title}" href="/sspa/click?ie=UTF8&spc=MToy&url=%2Fdp%2F{asin}"></a></h2>'
+                f'<img alt="{title}" src="/img/{asin}.jpg">'
+                f'<span class="a-price"><span class="a-offscreen">{whole},{fraction:02d} €</span></span></div>')
+    return (f'<div data-component-type="s-search-result" data-index="{index}" data-asin="{asin}">'
+            f'<div class="s-product-image-container"><img alt="{title}" src="/img/{asin}.jpg"></div>'
+            f'<h2 class="a-size-mini"><a class="a-link-normal" href="/dp/{asin}/ref=sr_1_{index}?keywords=bibs">'
+            f'<span class="a-size-base-plus a-text-normal">{title}</span></a></h2>'
+            f'<div class="a-row a-size-small"><span class="a-icon-alt">{rng.randint(30, 50) / 10} von 5 Sternen</span>'
+            f'<span class="a-size-base s-underline-text">{rng.randint(1, 20000):,}</span></div>'
+            f'<div class="a-row a-size-base"><span class="a-size-base">{rng.randint(1, 4)} Stück</span></div>'
+            f'<span class="a-price"><span class="a-offscreen">{whole},{fraction:02d} €</span>'
+            f'<span aria-hidden="true"><span class="a-price-whole">{whole},</span>'
+            f'<span class="a-price-fraction">{fraction:02d}</span><span class="a-price-symbol">€</span></span></span>'
+            f'<div class="a-row"><span class="a-color-secondary">Lieferung morgen</span></div></div>')
+
+
+def _meds_card(rng, index):
+    title = _title(rng)
+    slug = title.lower().replace(" ", "-")
+    return (f'<div class="product-card" data-index="{index}"><a href="/{slug}-p{rng.randint(10000, 99999)}">'
+            f'<img src="/images/{slug}.jpg"><span class="display-name">{title}</span></a>'
+            f'<div class="price-box"><div class="displayed-price">{rng.randint(29, 499)},{rng.choice(["00", "50", "95"])} kr</div></div>'
+            f'<button class="buy-button">Köp</button></div>')
+
+
+def _page(card_factory, cards_per_page, seed):
+    rng = random.Random(seed)
+    cards = "".join(card_factory(rng, i) for i in range(cards_per_page))
+    # Some navigation and footer boilerplate so cards are not the whole document
+    filler = "".join(f'<li><a href="/nav/{i}">Category {i}</a></li>' for i in range(60))
+    return (f'<!DOCTYPE html><html><head><title>Search</title><script>var x = {seed};</script></head>'
+            f'<body><header><ul>{filler}</ul></header><main><div class="s-main-slot">{cards}</div></main>'
+            f'<footer><ul>{filler}</ul></footer></body></html>')
+
+
+def amazon_page(cards_per_page, seed=0):
+    """An amazon.de style search result page"""
+    return _page(_amazon_card, cards_per_page, seed)
+
+
+def meds_page(cards_per_page, seed=0):
+    """A meds.se style search result page"""
+    return _page(_meds_card, cards_per_page, seed)
+
+
+def pages(retailer, cards_per_page, page_count, distinct=20):
+    """Page items as found in a crawl feed; only `distinct` different pages are generated and reused."""
+    factory = amazon_page if retailer == "amazon.de" else meds_page
+    templates = [factory(cards_per_page, seed) for seed in range(min(distinct, page_count))]
+    return [{"page_number": str(i + 1), "html": templates[i % len(templates)]} for i in range(page_count)]
@@ -3,8 +3,8 @@ from src.scrapers.amazon_search_spider import AmazonSearchSpider
 from src.processors.post_processor import PostProcessor
 from src.extractors.amazon_extractor import AmazonExtractor
 from src.pipeline import ScraperPipeline
+from src.batch import BatchRunner
 
-from bs4 import BeautifulSoup
 import json
 import os
 import scrapy
@@ -70,17 +70,13 @@ def run_scraper(search_term, base_url, max_pages):
 
     # Do a basic data analysis
     data = scraped_data
-    cards = []
+    extractor = AmazonExtractor()
     for i, page in enumerate(data[:2]):  # Only check the first few pages to avoid too much data
-        html_content = page["html"]
-        soup = BeautifulSoup(html_content, "html.parser")
+        # Check if it contains product listings (lxml, the same parser the extractor uses)
+        card_count = extractor.count_cards(extractor.parse_document(page["html"]))
 
-        # Check if it contains product listings
-        product_cards = soup.select('div[data-component-type="s-search-result"]')
-
-        if product_cards:
-            print(f"✅ Page {i + 1} contains {len(product_cards)} products")
-            cards.extend(product_cards)  # Add directly to cards list for later processing
+        if card_count:
+            print(f"✅ Page {i + 1} contains {card_count} products")
         else:
             print(f"❌ Page {i + 1} found no products, possibly blocked by Amazon anti-scraping measures")
         
@@ -132,14 +128,17 @@ def main():
         # "Search_term": "BIBS Pacifier Box",
         # Without Search_term, it will default to BIBS Pacifier
     }
-    
-    # meds.se spider call
-    # meds_pipeline = ScraperPipeline(retailer_url="meds.se", config=config)
-    # meds_pipeline.run_pipeline()
 
-    # amazon.de spider call
-    amazon_pipeline = ScraperPipeline(retailer_url="amazon.de", config=config)
-    amazon_pipeline.run_pipeline()
+    # All retailers are crawled concurrently in one reactor; add more brand/category configs as needed
+    configs = [
+        {**config, "Retailer": "amazon.de"},
+        {**config, "Retailer": "meds.se"},
+    ]
+    BatchRunner(configs).run()
+
+    # Single pipeline call (only one per Python process, the reactor can't be restarted)
+    # amazon_pipeline = ScraperPipeline(retailer_url="amazon.de", config=config)
+    # amazon_pipeline.run_pipeline()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,47 @@
+from twisted.internet import defer
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+from src.pipeline import ScraperPipeline, stop_reactor
+
+
+class BatchRunner:
+    """Run many pipeline configs (brand × category × retailer) in a single Twisted reactor.
+
+    Every config is a regular pipeline config with an extra "Retailer" key, e.g.
+    {"Retailer": "meds.se", "Brand": "BIBS", "Category": "Pacifier Box"}.
+    """
+
+    def __init__(self, configs, max_crawls_per_domain=2, max_requests_per_domain=4):
+        self.max_crawls_per_domain = max_crawls_per_domain
+        self.max_requests_per_domain = max_requests_per_domain
+        # Every pipeline gets its own run workspace, so the concurrent feeds never collide
+        self.pipelines = [ScraperPipeline(retailer_url=config["Retailer"], config=config) for config in configs]
+
+    def run(self):
+        """Crawl all configs concurrently, then extract and save each result."""
+        print(f"🚀 Starting batch of {len(self.pipelines)} spiders...")
+        self.run_crawls()
+
+        for pipeline in self.pipelines:
+            print(f"🔍 Processing '{pipeline.search_term}' product data (market: {pipeline.retailer_url})...")
+            pipeline.process_scraped_pages(pipeline.load_scraped_data())
+
+    def run_crawls(self):
+        """Schedule every spider on one CrawlerProcess and block until all of them finish."""
+        settings = get_project_settings()
+        # Bounds parallel requests inside each crawl; the semaphores below bound parallel crawls per domain
+        settings.set("CONCURRENT_REQUESTS_PER_DOMAIN", self.max_requests_per_domain)
+        process = CrawlerProcess(settings)
+
+        semaphores = {}
+        crawls = []
+        for pipeline in self.pipelines:
+            if pipeline.retailer_url not in semaphores:
+                semaphores[pipeline.retailer_url] = defer.DeferredSemaphore(self.max_crawls_per_domain)
+            crawls.append(semaphores[pipeline.retailer_url].run(pipeline.schedule_crawl, process))
+
+        # Queued crawls are not known to CrawlerProcess.join(), so stop the reactor ourselves
+        finished = defer.DeferredList(crawls, consumeErrors=True)
+        finished.addBoth(stop_reactor)
+        process.start(stop_after_crawl=False)
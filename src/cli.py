@@ -0,0 +1,196 @@
+import argparse
+import json
+import sys
+
+from src.retailers import RETAILERS
+
+# Every command imports what it needs inside its handler: listing retailers, exporting or matching
+# data never imports Scrapy or Twisted, and only crawling commands pay for them
+
+
+def _pipeline_config(args):
+    # Command line options take precedence over the config file
+    config = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    if args.brand:
+        config["Brand"] = args.brand
+    if args.category:
+        config["Category"] = args.category
+    if args.output:
+        config["Output"] = args.output
+    if args.search_term:
+        config["Search_term"] = args.search_term
+    if args.max_pages is not None:
+        config["Max_pages"] = args.max_pages
+    if getattr(args, "backend", None):
+        config["Backend"] = args.backend
+    return config
+
+
+def scrape(args):
+    from src.pipeline import ScraperPipeline
+
+    pipeline = ScraperPipeline(retailer_url=args.retailer, config=_pipeline_config(args))
+    if args.retries:
+        pipeline.run_retries()
+    else:
+        pipeline.run_pipeline()
+
+
+def re_extract(args):
+    from src.pipeline import ScraperPipeline
+
+    pipeline = ScraperPipeline(retailer_url=args.retailer, config=_pipeline_config(args))
+    df = pipeline.extract_archived_pages(since=args.since, until=args.until)
+    print(f"📦 Products re-extracted from the archive: {len(df)}")
+    pipeline.save_archived_results(df)
+
+
+def batch(args):
+    from src.batch import BatchRunner
+    from src.worker import expand_configs
+
+    with open(args.configs_file, "r", encoding="utf-8") as f:
+        configs = expand_configs(json.load(f), list(RETAILERS))
+    BatchRunner(configs).run()
+
+
+def export(args):
+    from src.storage.writers import export_to_excel
+
+    filters = {"retail": args.retail} if args.retail else {}
+    export_to_excel(args.dataset, args.output_excel, **filters)
+
+
+def dedupe(args):
+    import pandas as pd
+
+    from src.processors.post_processor import StreamingDeduplicator
+
+    # CSV is read and written in chunks, so files larger than memory work too
+    deduplicator = StreamingDeduplicator(spill_dir=args.spill_dir)
+    if args.input.endswith(".xlsx"):
+        batches = [pd.read_excel(args.input)]
+    else:
+        batches = pd.read_csv(args.input, chunksize=args.chunk_size)
+    unique = deduplicator.iter_batches(batches)
+    if args.output.endswith(".xlsx"):
+        frames = list(unique)
+        (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()).to_excel(args.output, index=False)
+    else:
+        for number, batch in enumerate(unique):
+            batch.to_csv(args.output, mode="w" if number == 0 else "a", header=number == 0, index=False)
+    deduplicator.close()
+    print(f"🧹 {deduplicator.rows_in} rows, {deduplicator.rows_out} after removing duplicates: {args.output}")
+
+
+def match(args):
+    import pandas as pd
+
+    from src.processors.product_matcher import ProductMatcher, price_comparison
+    from src.storage.writers import read_runs
+
+    # Rows only carry their RunId; brand, category and market live in the runs table
+    df = pd.read_parquet(args.dataset)
+    runs = read_runs(args.dataset)
+    if not runs.empty:
+        df = df.merge(runs[["RunId", "Brand", "Category", "Market"]], on="RunId", how="left")
+    matched = ProductMatcher(threshold=args.threshold).match(df)
+    with pd.ExcelWriter(args.output_excel) as writer:
+        price_comparison(matched).to_excel(writer, sheet_name="Comparison", index=False)
+        matched.to_excel(writer, sheet_name="Products", index=False)
+    print(f"🔗 {len(matched)} products matched into {matched['MatchId'].nunique()} groups: {args.output_excel}")
+
+
+def history(args):
+    import datetime
+
+    from src.storage.price_history import PriceHistory
+
+    price_history = PriceHistory()
+    since = datetime.timedelta(days=args.days) if args.days else None
+    print(price_history.price_stats(args.product_keys, args.retailer, since=since).to_string(index=False))
+    print(price_history.latest_prices(args.product_keys, args.retailer).to_string(index=False))
+    price_history.close()
+
+
+def list_retailers(args):
+    for retailer in RETAILERS.values():
+        print(f"{retailer.domain}\t{retailer.market}\t{retailer.currency}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # The worker has its own argument parser
+    if argv[:1] == ["worker"]:
+        from src.worker import main as worker_main
+
+        return worker_main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Scrape, re-extract, deduplicate, match and export product data.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_search_arguments(command):
+        command.add_argument("--retailer", required=True, choices=list(RETAILERS))
+        command.add_argument("--brand")
+        command.add_argument("--category")
+        command.add_argument("--search-term", help="defaults to brand and category")
+        command.add_argument("--max-pages", type=int)
+        command.add_argument("--output", action="append", choices=["excel", "csv", "parquet"],
+                             help="output format, may be repeated (default: excel)")
+        command.add_argument("--config", help="JSON file with further pipeline config keys")
+
+    command = commands.add_parser("scrape", help="crawl one retailer and save the products")
+    add_search_arguments(command)
+    command.add_argument("--retries", action="store_true", help="only re-fetch queued failed pages that are due")
+    command.add_argument("--backend", choices=["scrapy", "asyncio"], help="fetch backend (default: scrapy)")
+    command.set_defaults(handler=scrape)
+
+    command = commands.add_parser("re-extract", help="re-run the extractor over archived pages, without fetching")
+    add_search_arguments(command)
+    command.add_argument("--since", help="ISO date or timestamp of the oldest archived page")
+    command.add_argument("--until", help="ISO date or timestamp of the newest archived page")
+    command.set_defaults(handler=re_extract)
+
+    command = commands.add_parser("batch", help="crawl the configs of a JSON file concurrently")
+    command.add_argument("configs_file", help="a list of pipeline configs; without Retailer they run for every retailer")
+    command.set_defaults(handler=batch)
+
+    command = commands.add_parser("export", help="export a Parquet dataset to Excel")
+    command.add_argument("dataset")
+    command.add_argument("output_excel")
+    command.add_argument("--retail", help="only this retailer")
+    command.set_defaults(handler=export)
+
+    command = commands.add_parser("dedupe", help="remove duplicate products from a CSV or Excel file")
+    command.add_argument("input")
+    command.add_argument("output")
+    command.add_argument("--chunk-size", type=int, default=100_000, help="CSV rows read at a time")
+    command.add_argument("--spill-dir", help="keep the hashes of seen products in this directory instead of memory")
+    command.set_defaults(handler=dedupe)
+
+    command = commands.add_parser("match", help="match products across retailers of a Parquet dataset")
+    command.add_argument("dataset")
+    command.add_argument("output_excel")
+    command.add_argument("--threshold", type=float, default=0.6)
+    command.set_defaults(handler=match)
+
+    command = commands.add_parser("history", help="price statistics and latest prices from the price history")
+    command.add_argument("product_keys", nargs="+", metavar="PRODUCT_KEY", help="ASIN or product path")
+    command.add_argument("--retailer", action="append", help="only these retailers")
+    command.add_argument("--days", type=int, default=90, help="statistics window, 0 for all observations")
+    command.set_defaults(handler=history)
+
+    command = commands.add_parser("retailers", help="list the supported retailers")
+    command.set_defaults(handler=list_retailers)
+
+    commands.add_parser("worker", help="coordinator/worker mode, see python -m src.worker --help")
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
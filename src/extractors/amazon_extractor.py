@@ -1,88 +1,66 @@
-from parsel import Selector
-from urllib.parse import urljoin
-from typing import List, Dict, Optional
-
-
-class AmazonExtractor:
-    def parse_products(self, html_content: str, 
-                       base_url: str = "https://www.amazon.com") -> List[Dict[str, Optional[str]]]:
-        """Parse Amazon search result page HTML and extract product information"""
-        sel = Selector(text=html_content)
-        products = []
-        base_http_url = base_url if base_url.startswith("http") else "https://" + base_url
-
-        for card in sel.css('div[data-component-type="s-search-result"]'):
-            product = self.extract_product_info(card, base_http_url)
-            if product:
-                products.append(product)
-
-        import json
-        with open('../../products.json', 'w') as f:
-            json.dump(products, f, indent=4)  # Save to JSON file
-        return products
-
-    def extract_product_info(self, card, base_http_url: str) -> Optional[Dict[str, Optional[str]]]:
-        """Extract information from a single product card"""
-        title = self.extract_title(card)
-        if not title:
-            return None
-
-        price, currency = self.extract_price_and_currency(card)
-        rating = self.extract_rating(card)
-        reviews_count = self.extract_reviews_count(card)
-        link = self.extract_link(card, base_http_url)
-        pack_size = self.extract_pack_size(card)
-
-        return {
-            "Title": title,
-            "Price": price,
-            "Currency": currency,
-            "Rating": rating,
-            "ReviewsCount": reviews_count,
-            "PackSize": pack_size,
-            "Link": link
-        }
-
-    def extract_title(self, card) -> Optional[str]:
-        """Extract product title"""
-        title = card.css('h2 a span::text').get() or card.css('h2 a::attr(aria-label)').get() or card.css(
-            'img::attr(alt)').get()
-        return title.strip() if title else None
-
-    def extract_price_and_currency(self, card) -> (Optional[str], Optional[str]):
-        """Extract price and currency"""
-        price_whole = card.css('span.a-price-whole::text').get()
-        price_fraction = card.css('span.a-price-fraction::text').get()
-        currency_symbol = card.css('span.a-price-symbol::text').get() or card.css('span.a-offscreen::text').re_first(
-            r'^[^\d]+')
-
-        if price_whole and price_fraction:
-            price = f"{price_whole.strip()}.{price_fraction.strip()}"
-        else:
-            price = card.css('span.a-offscreen::text').get()
-
-        if price:
-            price = price.strip().replace("$", "").replace(",", "").replace("€", "").replace("£", "")
-
-        currency = currency_symbol.strip() if currency_symbol else None
-        return price, currency
-
-    def extract_rating(self, card) -> Optional[str]:
-        """Extract rating"""
-        rating = card.css('span.a-icon-alt::text').get()
-        return rating.split()[0] if rating else None
-
-    def extract_reviews_count(self, card) -> Optional[str]:
-        """Extract number of reviews"""
-        reviews_count = card.css('span.a-size-base.s-underline-text::text').get()
-        return reviews_count.strip().replace(",", "") if reviews_count else None
-
-    def extract_link(self, card, base_http_url: str) -> Optional[str]:
-        """Extract product link"""
-        rel_link = card.css('a::attr(href)').get()
-        return urljoin(base_http_url, rel_link) if rel_link else None
-
-    def extract_pack_size(self, card) -> Optional[str]:
-        """Extract pack size"""
-        pack_size = card.css('div.a-row.a-size-base span.a-size-base::text').get()
-        return pack_size.strip() if pack_size else None
+from typing import Dict, Optional
+
+from src.extractors.field_spec import ExtractorSpec, Field, SpecExtractor
+from src.records import parse_count, parse_currency, parse_price, parse_rating
+
+
+def _price_minor(values: Dict[str, Optional[str]]) -> Optional[int]:
+    """Combine whole/fraction parts, falling back to the off-screen price text"""
+    whole, fraction = parse_count(values["_price_whole"]), parse_count(values["_price_fraction"])
+    if whole is not None and fraction is not None:
+        return whole * 100 + fraction
+    return parse_price(values["_price_offscreen"])
+
+
+def _currency(values: Dict[str, Optional[str]]) -> Optional[str]:
+    """Take the price symbol, or the symbol within the off-screen price text"""
+    return parse_currency(values["_price_symbol"]) or parse_currency(values["_price_offscreen"])
+
+
+AMAZON_SPEC = ExtractorSpec(
+    name="amazon",
+    # Bump whenever selectors or field parsing change, so archived pages get re-extracted
+    version="2",
+    card_selector='div[data-component-type="s-search-result"]',
+    fields=[
+        Field("Title", 'h2 a span::text', 'h2 a::attr(aria-label)', 'img::attr(alt)',
+              post=str.strip, required=True),
+        Field("PriceMinor", compute=_price_minor),
+        Field("Currency", compute=_currency),
+        Field("Rating", 'span.a-icon-alt::text', post=parse_rating),
+        Field("ReviewsCount", 'span.a-size-base.s-underline-text::text', post=parse_count),
+        Field("PackSize", 'div.a-row.a-size-base span.a-size-base::text', post=str.strip),
+        Field("Link", 'a::attr(href)', url=True),
+        Field("_price_whole", 'span.a-price-whole::text'),
+        Field("_price_fraction", 'span.a-price-fraction::text'),
+        Field("_price_symbol", 'span.a-price-symbol::text'),
+        Field("_price_offscreen", 'span.a-offscreen::text'),
+    ],
+    base_url="https://www.amazon.com",
+)
+
+
+class AmazonExtractor(SpecExtractor):
+    spec = AMAZON_SPEC
+
+
+# Product-detail page: the whole document is the single "card"
+AMAZON_DETAIL_SPEC = ExtractorSpec(
+    name="amazon_detail",
+    version="1",
+    card_selector='html',
+    fields=[
+        Field("Rating", '#acrPopover::attr(title)', 'span[data-hook="rating-out-of-text"]::text',
+              '#averageCustomerReviews span.a-icon-alt::text', post=parse_rating),
+        Field("ReviewsCount", '#acrCustomerReviewText::text', 'span[data-hook="total-review-count"]::text',
+              post=parse_count),
+        Field("PackSize", '#variation_size_name span.selection::text',
+              'tr.po-number_of_items td.po-break-word span::text', 'tr.po-unit_count td.po-break-word span::text',
+              post=str.strip),
+    ],
+    base_url="https://www.amazon.com",
+)
+
+
+class AmazonDetailExtractor(SpecExtractor):
+    spec = AMAZON_DETAIL_SPEC
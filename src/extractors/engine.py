@@ -0,0 +1,66 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _parse_chunk(extractor, base_url: str, html_chunk: List[str]) -> List[Tuple[int, List[Dict[str, Optional[str]]]]]:
+    """Worker entry point: parse a chunk of pages with the given extractor."""
+    return [extractor.extract_page(html, base_url=base_url) for html in html_chunk]
+
+
+def _chunked(iterable: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ExtractionEngine:
+    """Fan page parsing out across a process pool and return the results in input order.
+
+    Pages are dispatched in chunks and at most `workers * 2` chunks are in flight at a time, so
+    the input can be a lazy generator over tens of thousands of archived pages.
+    """
+
+    def __init__(self, extractor, base_url: str, workers: Optional[int] = None, chunksize: int = 8):
+        self.extractor = extractor
+        self.base_url = base_url
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+
+    def iter_page_results(self, html_pages: Iterable[str]) -> Iterator[Tuple[int, List[Dict[str, Optional[str]]]]]:
+        """Yield (card count, product list) of each page, in the same order as `html_pages`.
+
+        Each page is parsed exactly once; the card count doubles as the page validation.
+        """
+        if self.workers == 1:
+            for html in html_pages:
+                yield self.extractor.extract_page(html, base_url=self.base_url)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for chunk in _chunked(html_pages, self.chunksize):
+                pending.append(pool.submit(_parse_chunk, self.extractor, self.base_url, chunk))
+                if len(pending) >= self.workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def iter_pages(self, html_pages: Iterable[str]) -> Iterator[List[Dict[str, Optional[str]]]]:
+        """Yield the product list of each page, in the same order as `html_pages`."""
+        for _, products in self.iter_page_results(html_pages):
+            yield products
+
+    def iter_products(self, html_pages: Iterable[str]) -> Iterator[Dict[str, Optional[str]]]:
+        """Stream product rows one by one instead of building a merged list."""
+        for products in self.iter_pages(html_pages):
+            yield from products
+
+    def extract(self, html_pages: Iterable[str]) -> List[Dict[str, Optional[str]]]:
+        """Return all product rows of all pages as one ordered list."""
+        return list(self.iter_products(html_pages))
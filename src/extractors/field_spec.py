@@ -0,0 +1,140 @@
+from urllib.parse import urljoin
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lxml import etree
+from parsel import Selector
+from parsel.csstranslator import HTMLTranslator
+
+_translator = HTMLTranslator()
+
+
+class Field:
+    """A product field: CSS selectors tried in order (first non-empty match wins), plus post-processing.
+
+    Selectors may use parsel's `::text` and `::attr(name)` pseudo-elements. A field without
+    selectors is computed from the other values of the card via `compute(values)`. Fields whose
+    name starts with "_" are intermediate values and are not part of the output row.
+
+    Specs are pickled to extraction worker processes: `post` and `compute` must be module-level
+    functions (not lambdas), and the compiled XPaths are rebuilt from the selectors on unpickling.
+    """
+
+    def __init__(self, name: str, *selectors: str, post: Optional[Callable[[str], Optional[str]]] = None,
+                 compute: Optional[Callable[[Dict[str, Optional[str]]], Optional[str]]] = None,
+                 url: bool = False, required: bool = False):
+        self.name = name
+        self.selectors = selectors
+        self.post = post
+        self.compute = compute
+        self.url = url
+        self.required = required
+        self._compile()
+
+    def _compile(self):
+        # CSS is translated and compiled to XPath once, not per card
+        self.xpaths = [etree.XPath(_translator.css_to_xpath(css), smart_strings=False) for css in self.selectors]
+
+    def __getstate__(self):
+        # lxml's XPath objects can't be pickled
+        return {key: value for key, value in self.__dict__.items() if key != "xpaths"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+
+class ExtractorSpec:
+    """Declarative description of a retailer's search-result cards."""
+
+    def __init__(self, name: str, version: str, card_selector: str, fields: List[Field], base_url: str):
+        self.name = name
+        self.version = version
+        self.base_url = base_url
+        self.card_selector = card_selector
+        self.card_xpath = etree.XPath(_translator.css_to_xpath(card_selector))
+        self.fields = fields
+        self.selector_fields = [field for field in fields if field.xpaths]
+        self.computed_fields = [field for field in fields if field.compute is not None]
+        self.output_names = [field.name for field in fields if not field.name.startswith("_")]
+
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key != "card_xpath"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.card_xpath = etree.XPath(_translator.css_to_xpath(self.card_selector))
+
+
+class SpecExtractor:
+    """Extractor driven by an ExtractorSpec; subclasses (or instances) only provide the spec."""
+
+    spec: ExtractorSpec = None
+
+    def __init__(self, spec: Optional[ExtractorSpec] = None):
+        if spec is not None:
+            self.spec = spec
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def version(self) -> str:
+        return self.spec.version
+
+    def parse_document(self, html_content: str):
+        """Parse page HTML into an lxml document, the same way parsel does."""
+        return Selector(text=html_content).root
+
+    def parse_products(self, html_content: str, base_url: Optional[str] = None) -> List[Dict[str, Optional[str]]]:
+        """Parse a search result page HTML and extract product information"""
+        return self.extract_products(self.parse_document(html_content), base_url)
+
+    def extract_page(self, html_content: str, base_url: Optional[str] = None) -> Tuple[int, List[Dict[str, Optional[str]]]]:
+        """Parse a page once and return its number of product cards (for validation) and its products"""
+        cards = self.spec.card_xpath(self.parse_document(html_content))
+        return len(cards), self.extract_cards(cards, base_url)
+
+    def count_cards(self, document) -> int:
+        """Number of product cards on an already parsed page; zero usually means a blocked page"""
+        return len(self.spec.card_xpath(document))
+
+    def extract_products(self, document, base_url: Optional[str] = None) -> List[Dict[str, Optional[str]]]:
+        """Extract product information from an already parsed page"""
+        return self.extract_cards(self.spec.card_xpath(document), base_url)
+
+    def extract_cards(self, cards, base_url: Optional[str] = None) -> List[Dict[str, Optional[str]]]:
+        base_url = base_url or self.spec.base_url
+        base_http_url = base_url if base_url.startswith("http") else "https://" + base_url
+        products = []
+        for card in cards:
+            product = self.extract_product_info(card, base_http_url)
+            if product:
+                products.append(product)
+        return products
+
+    def extract_product_info(self, card, base_http_url: str) -> Optional[Dict[str, Optional[str]]]:
+        """Evaluate every field of the spec against a single product card"""
+        values = {}
+        for field in self.spec.selector_fields:
+            value = None
+            for xpath in field.xpaths:
+                matches = xpath(card)
+                if matches and matches[0]:
+                    value = matches[0]
+                    break
+            if value is not None:
+                if field.post is not None:
+                    value = field.post(value)
+                if field.url:
+                    value = urljoin(base_http_url, value)
+            if field.required and not value:
+                return None
+            values[field.name] = value
+
+        for field in self.spec.computed_fields:
+            values[field.name] = field.compute(values)
+            if field.required and not values[field.name]:
+                return None
+
+        return {name: values[name] for name in self.spec.output_names}
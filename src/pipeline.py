@@ -1,29 +1,47 @@
+import asyncio
 import json
 import os
 import datetime
+import shutil
+import time
+import uuid
 import pandas as pd
-from bs4 import BeautifulSoup
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-from src.scrapers.amazon_search_spider import AmazonSearchSpider
-from src.extractors.amazon_extractor import AmazonExtractor
+from src.retailers import get_retailer
+from src.scrapers.replay import ReplayServer
 
-from src.scrapers.meds_spider import MedsSearchSpider
-from src.extractors.meds_extractor import MedsExtractor
+from src.extractors.engine import ExtractionEngine
 
-from src.processors.post_processor import PostProcessor
-from src.utils import get_unique_filename, copy_and_rename_json, delete_file, get_market_country_based_on_url
+from src.processors.post_processor import PostProcessor, StreamingDeduplicator
+from src.processors.change_detector import CHANGE_LOG_COLUMNS, STATE_DTYPES, ChangeDetector
+from src.processors.product_details import ProductDetailStore, apply_details
+from src.storage.page_store import PageStore
+from src.storage.debug_sink import DebugSink
+from src.storage.price_history import PriceHistory
+from src.storage.retry_queue import RetryQueue
+from src.storage.rate_budget import budget_domain
+from src.storage.writers import ExcelWriter, CsvWriter, ParquetWriter
+from src.records import PRODUCT_COLUMNS, RunMetadata, to_frame
+from src.run_report import RunReport, field_hit_rates
+from src.utils import delete_file
+
+
+def stop_reactor(_):
+    # Imported lazily so that Scrapy gets to install its own reactor first
+    from twisted.internet import reactor
+
+    if reactor.running:
+        reactor.stop()
 
-allowed_retailer_urls = ["amazon.de", "meds.se", "apotea.se"]
 
 class ScraperPipeline:
-    def __init__(self, retailer_url, config):
-        assert retailer_url in allowed_retailer_urls, f"not supported retailer_url: {retailer_url}, allowed: {allowed_retailer_urls}"
-        
-        # Immutable parameters, mainly basic spider information
+    def __init__(self, retailer_url, config, feed_file=None):
+        # Immutable parameters, mainly basic spider information, looked up in the retailer registry.
+        # The spider (and with it Scrapy) is only imported once a crawl is scheduled
+        self.retailer = get_retailer(retailer_url)
         self.retailer_url = retailer_url
-        self.market_country = get_market_country_based_on_url(retailer_url)
-        self.search_spider, self.extractor = self.get_spider_and_extractor(retailer_url)
+        self.market_country = self.retailer.market
+        self.search_spider = None
+        self.extractor = self.retailer.load_extractor()
         
         # Automatically updated information, date and output file name, not affected by each scrape config
         self.date = datetime.datetime.now().strftime("%d/%m/%Y")
@@ -32,101 +50,558 @@ class ScraperPipeline:
         self.brand = config.get("Brand", "")
         self.category = config.get("Category", "")
         self.max_pages = config.get("Max_pages", 2)
-        self.output_excel = get_unique_filename(f"./results/{self.retailer_url.replace('.', '-').lower()}_{self.date.replace('/', '-')}_Brand-{self.brand}_Category-{self.category}.xlsx")        
         self.search_term = config.get("Search_term", f"{self.brand} {self.category}".strip())
+        # Run-level metadata, stored once per run and referenced from every product row by RunId
+        self.run = RunMetadata(
+            run_id=f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            date=datetime.date.today().isoformat(),
+            market=self.market_country,
+            retail=self.retailer_url,
+            brand=self.brand,
+            category=self.category,
+            search_term=self.search_term,
+        )
+        # Stage timings, counters, field hit rates and Scrapy stats of this run, written as JSON
+        # (Run_report) and optionally as Prometheus text (Prometheus: True or a file path)
+        self.report = RunReport(self.run)
+        self.report_file = None
+        if config.get("Run_report", True):
+            self.report_file = f"./results/reports/{self.retailer_url.replace('.', '-').lower()}_{self.run.run_id}.json"
+        self.prometheus_file = config.get("Prometheus", False)
+        if self.prometheus_file is True:
+            self.prometheus_file = f"./results/reports/{self.retailer_url.replace('.', '-').lower()}_{self.run.run_id}.prom"
+        # Output formats, any of "excel" (one file per run), "csv" and "parquet" (both appended to across runs)
+        # With change detection, only new/removed/changed products are written; the current snapshot of the
+        # retailer and search term replaces ./results/snapshots/<retailer>_<search term>.csv on every run
+        # Replayed pages are old observations, they never update the product state either (see Price_history)
+        self.change_detection = config.get("Change_detection", False) and not config.get("Replay", False)
+        self.output_formats = config.get("Output", ["excel"])
+        self.writers = self.get_writers(self.output_formats, "changes" if self.change_detection else "products")
+        # Fetch backend: "scrapy" (CrawlerProcess, for bulk crawls) or "asyncio" (AsyncFetcher, for small
+        # on-demand crawls; can run any number of times per process, see run_scraper_async)
+        self.backend = config.get("Backend", "scrapy")
+        if self.backend not in ("scrapy", "asyncio"):
+            raise ValueError(f"Unsupported backend: {self.backend}")
+        # Streaming mode extracts products inside the crawl instead of re-parsing the saved HTML afterwards
+        self.streaming = config.get("Streaming", False) and self.backend == "scrapy"
+        self.archive_html = config.get("Archive_html", True)
+        # Number of processes used to parse pages; 1 keeps extraction in-process
+        self.workers = config.get("Workers", 1)
+        # Opt-in NDJSON dump of every extracted row, written in batches to a file of its own per run
+        self.debug_sink_file = None
+        if config.get("Debug_sink", False):
+            self.debug_sink_file = f"./temp/debug/{self.retailer_url.replace('.', '-').lower()}_{self.run.run_id}_products.jsonl"
+        # Set by run_retries: only these previously failed pages are fetched
+        self.retry_pages = None
+        # Offline replay: crawl archived pages from a local ReplayServer instead of the retailer, e.g.
+        # {"latency": 0.3, "jitter": 0.2, "error_rate": 0.05, "captcha_rate": 0.02, "seed": 1} (or True).
+        # Replayed pages are not re-archived and failures are not queued for retry
+        self.replay = config.get("Replay", False)
+        self.replay_server = None
+        # Optional second stage: follow product links to their detail pages for fields missing or
+        # truncated on the cards. Products whose card is unchanged since the last run reuse their
+        # stored details. Not available in replay mode, detail pages are not archived
+        self.detail_pages = config.get("Detail_pages", False) and not self.replay and self.backend == "scrapy"
+        # Every priced product is also recorded in ./results/price_history.sqlite for history queries.
+        # Replayed pages are old observations, they are never recorded again
+        self.price_history = config.get("Price_history", True) and not self.replay
+        # Requests per minute allowed for this retailer, shared by every process using ./temp/rate_budget.sqlite
+        self.rate_budget = config.get("Rate_budget")
+        self.detail_plan = None
+        # Filled once per crawl, so the detail stage and process_scraped_pages share them
+        self.scraped_pages = None
+        self.products = None
+        # Duplicates are dropped while rows are extracted, so only unique products are ever held in memory.
+        # With Dedupe_spill (True or a directory) even the product hashes are spilled to disk
+        self.dedupe_spill = config.get("Dedupe_spill", False)
+        self.extracted_rows = 0
+        # Archived pages read by extract_archived_pages, marked once their rows are saved
+        self.archived_pages = []
+
+        # Isolated per-run workspace for the spider feed and streamed rows, so concurrent runs
+        # (threads, processes, cron jobs, or pipelines sharing one reactor) never share files.
+        # Passing feed_file points run_scraper(debug=True) at an existing feed instead of the latest archived fetch
+        self.workspace = os.path.join("./temp/runs", self.run.run_id)
+        self.feed_file = feed_file or os.path.join(self.workspace, "feed.json")
+        self.products_file = os.path.join(self.workspace, "products.jsonl")
+        self.detail_feed_file = os.path.join(self.workspace, "details.json")
+        self.base_http_url = self.retailer_url if self.retailer_url.startswith("http") else "https://www." + self.retailer_url
 
 
     def run_scraper(self, debug=False):
         """Run Scrapy spider to collect raw HTML content."""
-        temp_scraped_data_file = "./scraped_data.json"
-        output_file = get_unique_filename("./temp/scraped_data.json")
-        
-        # Used only for debug; no spider run is needed, just read previous results
+        # Used only for debug; no spider run is needed, just read previous results.
+        # Pages are validated (card count) in the same pass that extracts them, see extract_data
         if debug:
-            with open(temp_scraped_data_file, "r", encoding="utf-8") as f:
+            # Workspaces are removed once their run is saved, so without an explicit feed_file the
+            # latest archived fetch of this retailer and search term is used
+            if self.feed_file == os.path.join(self.workspace, "feed.json"):
+                page_store = PageStore()
+                scraped_data = page_store.latest_fetch(self.retailer_url, self.search_term)
+                page_store.close()
+                if not scraped_data:
+                    raise ValueError(f"No archived pages of '{self.search_term}' ({self.retailer_url}) to debug with, "
+                                     "pass ScraperPipeline(..., feed_file=...)")
+                return scraped_data
+            with open(self.feed_file, "r", encoding="utf-8") as f:
                 scraped_data = json.load(f)
-            # Basic analysis of product existence in HTML
-            cards = []
-            for i, page in enumerate(scraped_data[:2]):
-                html = page["html"]
-                soup = BeautifulSoup(html, "html.parser")
-                products = soup.select('div[data-component-type="s-search-result"]')
-                if products:
-                    print(f"✅ Page {i + 1} contains {len(products)} products")
-                    cards.extend(products)
-                else:
-                    print(f"❌ Page {i + 1} found no products, possibly blocked by anti-scraping measures")
-            return scraped_data
+            return [page for page in scraped_data if "html" in page]
         
+        if self.backend == "asyncio":
+            return asyncio.run(self.run_scraper_async())
+
         print("🚀 Starting Scrapy spider...")
-        
-        # Delete old temp file to avoid conflicts; the spider will automatically create a new file, otherwise appends to existing content causing errors
-        delete_file(temp_scraped_data_file)
+
+        # Scrapy is imported here rather than at module level, so non-crawling tasks start fast
+        from scrapy.crawler import CrawlerProcess
+        from scrapy.utils.project import get_project_settings
 
         # Run spider
         process = CrawlerProcess(get_project_settings())
-        process.crawl(
+        # The detail crawl is only scheduled once the search results are planned in a thread, and
+        # CrawlerProcess.join() doesn't wait for it, so stop the reactor once the whole chain is done
+        self.schedule_crawl(process).addBoth(stop_reactor)
+        process.start(stop_after_crawl=False)
+
+        return self.load_scraped_data()
+
+    async def run_scraper_async(self, fetcher=None):
+        """Fetch the search pages with the asyncio backend, e.g. from a long-running service.
+
+        Pass a shared AsyncFetcher to reuse its pooled connections and per-domain delays across runs.
+        """
+        from src.scrapers.async_fetcher import AsyncFetcher
+
+        delete_file(self.feed_file)
+        self.start_replay_server()
+        own_fetcher = fetcher is None
+        fetcher = fetcher or AsyncFetcher()
+        if self.rate_budget:
+            fetcher.rate_budgets.setdefault(budget_domain(self.retailer_url), self.rate_budget)
+        start = time.perf_counter()
+        try:
+            pages, stats = await fetcher.crawl(
+                self.search_spider or self.retailer.load_spider(),
+                base_url=self.retailer_url,
+                search_term=self.search_term,
+                max_pages=self.max_pages,
+                retry_pages=self.retry_pages,
+                replay_url=self.replay_server.url if self.replay_server else None,
+            )
+        finally:
+            if own_fetcher:
+                await fetcher.close()
+        self.report.add_stage("crawl", time.perf_counter() - start)
+        self.report.add_scrapy_stats("crawl", stats)
+
+        # The same feed a Scrapy crawl leaves behind, so archiving and retry bookkeeping don't change
+        os.makedirs(os.path.dirname(self.feed_file), exist_ok=True)
+        with open(self.feed_file, "w", encoding="utf-8") as f:
+            json.dump(pages, f, ensure_ascii=False)
+        return self.load_scraped_data()
+
+    async def run_pipeline_async(self, fetcher=None):
+        """run_pipeline for the asyncio backend; extraction and saving run in a worker thread."""
+        print(f"🔍 Scraping '{self.search_term}' product data (market: {self.retailer_url})...")
+        scraped_pages = await self.run_scraper_async(fetcher)
+        await asyncio.to_thread(self.process_scraped_pages, scraped_pages)
+
+    def start_replay_server(self):
+        if self.replay:
+            options = self.replay if isinstance(self.replay, dict) else {}
+            self.replay_server = ReplayServer(retailer=self.retailer_url, **options).start()
+
+    def schedule_crawl(self, process):
+        """Schedule this pipeline's spider on a CrawlerProcess and return the crawl Deferred."""
+        # Delete old temp file to avoid conflicts; the spider will automatically create a new file, otherwise appends to existing content causing errors
+        delete_file(self.feed_file)
+        self.start_replay_server()
+        streaming_kwargs = {}
+        if self.streaming:
+            delete_file(self.products_file)
+            streaming_kwargs = {
+                "extractor": self.extractor,
+                "products_uri": self.products_file,
+                "products_base_url": self.base_http_url,
+                "archive_html": self.archive_html,
+            }
+        if self.search_spider is None:
+            self.search_spider = self.retailer.load_spider()
+        crawl = self.crawl(
+            process,
             self.search_spider,
+            "crawl",
             base_url=self.retailer_url,
             search_term=self.search_term,
-            max_pages=self.max_pages
+            max_pages=self.max_pages,
+            feed_uri=self.feed_file,
+            retry_pages=self.retry_pages,
+            replay_url=self.replay_server.url if self.replay_server else None,
+            **streaming_kwargs,
         )
-        process.start()
+        if self.detail_pages:
+            # Chained: the returned Deferred fires only after the detail crawl is done as well
+            crawl.addCallback(lambda _: self.schedule_detail_crawl(process))
+        # Errors inside these callbacks would otherwise vanish in BatchRunner's DeferredList
+        crawl.addErrback(self.crawl_failed)
+        return crawl
+
+    def schedule_detail_crawl(self, process):
+        """Once the search crawl is done, crawl the detail pages of new or changed products."""
+        # Imported lazily so that Scrapy gets to install its own reactor first
+        from twisted.internet.threads import deferToThread
+
+        # Extraction and planning parse every page; in a thread they don't stall the other crawls of the reactor
+        return deferToThread(self.plan_detail_crawl).addCallback(lambda fetches: self.start_detail_crawl(process, fetches))
+
+    def plan_detail_crawl(self):
+        """Extract the search results and return the products whose detail pages need fetching."""
+        df = self.post_process(self.extract_products(self.load_scraped_data()))
+        if df.empty:
+            return []
+        self.detail_plan = self.plan_detail_pages(df)
+        fetches, cached = self.detail_plan
+        print(f"🔎 Fetching {len(fetches)} product detail pages, {len(cached)} unchanged products reuse stored details")
+        delete_file(self.detail_feed_file)
+        return fetches
+
+    def start_detail_crawl(self, process, fetches):
+        if not fetches:
+            return None
+        from src.scrapers.detail_spider import DetailSpider
+        return self.crawl(process, DetailSpider, "detail_crawl", products=fetches, feed_uri=self.detail_feed_file)
+
+    def crawl_failed(self, failure):
+        """Errback of the crawl chain: log the error and mark the run failed instead of saving partial results."""
+        self.report.error = f"{failure.type.__name__}: {failure.getErrorMessage()}"
+        print(f"❌ Crawl of '{self.search_term}' ({self.retailer_url}) failed: {self.report.error}")
+        failure.printTraceback()
+
+    def crawl(self, process, spider, stage, **kwargs):
+        """Start a crawl, timing it and keeping its Scrapy stats for the run report."""
+        crawler = process.create_crawler(spider)
+        if self.rate_budget:
+            kwargs["rate_budgets"] = {budget_domain(self.retailer_url): self.rate_budget}
+        start = time.perf_counter()
+
+        def finished(result):
+            self.report.add_stage(stage, time.perf_counter() - start)
+            self.report.add_scrapy_stats(stage, crawler.stats.get_stats())
+            return result
+
+        return process.crawl(crawler, **kwargs).addBoth(finished)
+
+    def plan_detail_pages(self, df):
+        store = ProductDetailStore()
+        plan = store.plan(df, self.retailer_url, self.base_http_url)
+        store.close()
+        return plan
+
+    def load_scraped_data(self):
+        """Archive and load the feed written by a finished crawl."""
+        if self.scraped_pages is not None:
+            return self.scraped_pages
+        with self.report.stage("load_feed"):
+            self.scraped_pages = self._load_feed()
+        return self.scraped_pages
+
+    def _load_feed(self):
+        if self.replay_server is not None:
+            self.replay_server.stop()
+            self.replay_server = None
 
         # Check if spider succeeded by checking file existence
-        if not os.path.exists(temp_scraped_data_file):
+        if not os.path.exists(self.feed_file):
             print("❌ Scraping failed or no results found.")
             return []
 
-        # Copy and rename JSON file to ensure uniqueness; useful for future data tracing
-        copy_and_rename_json(temp_scraped_data_file, output_file)
-        
         # Load JSON data and complete scraping retrieval
-        with open(output_file, "r", encoding="utf-8") as f:
+        with open(self.feed_file, "r", encoding="utf-8") as f:
             scraped_data = json.load(f)
+
+        # Blocked, empty and failed pages go to the retry queue; only fetched pages are processed further
+        scraped_data, _ = self.record_page_health(scraped_data)
+        if not self.replay:
+            # Archive the raw pages (compressed, deduplicated); useful for data tracing and re-extraction
+            page_store = PageStore()
+            page_store.add_pages(scraped_data, self.retailer_url, self.search_term, self.run.run_id)
+            page_store.close()
         return scraped_data
 
+    def record_page_health(self, scraped_data):
+        """Split feed items into fetched and failed pages, queue the failures and report the success rate.
+
+        Replay runs only report: their failures are injected, not real.
+        """
+        pages = [page for page in scraped_data if page.get("status", "ok") == "ok"]
+        failed_pages = [page for page in scraped_data if page.get("status", "ok") != "ok"]
+
+        total = len(pages) + len(failed_pages)
+        success_rate = len(pages) / total if total else None
+        self.report.count("pages_ok", len(pages))
+        self.report.count("pages_failed", len(failed_pages))
+        if not self.replay:
+            queue = RetryQueue()
+            queue.resolve(pages, self.retailer_url, self.search_term)
+            queue.add_failures(failed_pages, self.retailer_url, self.search_term)
+            queue.record_run(self.run.run_id, self.retailer_url, self.search_term, len(pages), len(failed_pages))
+            queue.close()
+
+        if success_rate is not None:
+            print(f"📊 Page success rate: {len(pages)}/{total} ({success_rate:.0%})")
+        for page in failed_pages:
+            print(f"⛔ Page {page.get('page_number')} {page.get('reason') or page.get('status')}"
+                  f"{'' if self.replay else ', queued for retry'}: {page.get('url')}")
+        return pages, failed_pages
+
     def extract_data(self, scraped_pages):
-        all_products = []
-        for page in scraped_pages:
-            products = self.extractor.parse_products(page['html'], base_url=self.retailer_url if self.retailer_url.startswith("http") else "https://www." + self.retailer_url)
-            all_products.extend(products)
-        return pd.DataFrame(all_products)
+        """Validate and extract every page in a single parse: pages without product cards are reported.
+
+        Duplicate products are dropped page by page, and each page's HTML is released once parsed
+        (it is archived in the PageStore by now).
+        """
+        engine = ExtractionEngine(self.extractor, self.base_http_url, workers=self.workers)
+        sink = DebugSink(self.debug_sink_file) if self.debug_sink_file is not None else None
+        deduplicator = self.deduplicator()
+        unique_products = []
+        pages_with_cards = 0
+        for page, (card_count, products) in zip(scraped_pages, engine.iter_page_results(page['html'] for page in scraped_pages)):
+            page.pop("html", None)
+            if card_count:
+                pages_with_cards += 1
+            else:
+                print(f"❌ Page {page.get('page_number')} found no products, possibly blocked by anti-scraping measures")
+            if products:
+                unique_products.append(deduplicator.filter(pd.DataFrame(products)))
+            if sink is not None:
+                sink.add(products)
+        print(f"✅ {pages_with_cards}/{len(scraped_pages)} pages contain product cards")
+        if sink is not None:
+            sink.close()
+            print(f"🐞 Extracted rows dumped to: {self.debug_sink_file}")
+        return self.finish_dedupe(deduplicator, unique_products)
+
+    def deduplicator(self):
+        spill_dir = os.path.join(self.workspace, "dedupe") if self.dedupe_spill is True else self.dedupe_spill
+        return StreamingDeduplicator(spill_dir=spill_dir or None)
+
+    def finish_dedupe(self, deduplicator, frames):
+        deduplicator.close()
+        self.extracted_rows = deduplicator.rows_in
+        return to_frame(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+
+    def extract_archived_pages(self, since=None, until=None):
+        """Re-run the extractor over archived pages of this retailer/search term without re-fetching.
+
+        Rows are per fetch: each keeps the FetchedAt time and SourceRunId of the crawl that archived its
+        page, and duplicates are only dropped within one fetch, never across fetches. Pages whose rows
+        were already saved with this extractor version are skipped, so the append-only outputs never
+        receive the same rows twice.
+        """
+        page_store = PageStore()
+        fetches = {}
+        self.archived_pages = []
+        for page, products in page_store.re_extract(self.extractor, self.base_http_url, workers=self.workers, changed_only=True,
+                                                    retailer=self.retailer_url, search_term=self.search_term,
+                                                    since=since, until=until):
+            self.archived_pages.append(page)
+            rows = [{**product, "FetchedAt": page["fetched_at"], "SourceRunId": page["run_id"]} for product in products]
+            fetches.setdefault((page["fetched_at"], page["run_id"]), []).extend(rows)
+        page_store.close()
+        frames = [self.post_process(to_frame(rows)) for rows in fetches.values() if rows]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def extract_products(self, scraped_pages):
+        """Product rows of the crawl, streamed during the crawl or extracted from the pages (once)."""
+        if self.products is None:
+            with self.report.stage("extract"):
+                self.products = self.load_streamed_products() if self.streaming else self.extract_data(scraped_pages)
+            self.report.count("products_extracted", self.extracted_rows)
+            self.report.field_hit_rates = field_hit_rates(self.products, self.extractor.spec.output_names)
+        return self.products
+
+    def add_product_details(self, df):
+        """Overlay detail-page fields: freshly crawled for new/changed products, stored for unchanged ones."""
+        fetches, cached = self.detail_plan or self.plan_detail_pages(df)
+        details = dict(cached)
+
+        fetched = []
+        if fetches and os.path.exists(self.detail_feed_file):
+            with open(self.detail_feed_file, "r", encoding="utf-8") as f:
+                pages = [page for page in json.load(f) if page.get("status") == "ok"]
+            card_hashes = {fetch["ProductKey"]: fetch["CardHash"] for fetch in fetches}
+            engine = ExtractionEngine(self.retailer.load_detail_extractor(), self.base_http_url, workers=self.workers)
+            for page, products in zip(pages, engine.iter_pages(page["html"] for page in pages)):
+                if products:
+                    details[page["ProductKey"]] = products[0]
+                    fetched.append((page["ProductKey"], card_hashes[page["ProductKey"]], products[0]))
+            store = ProductDetailStore()
+            store.save(self.retailer_url, fetched)
+            store.close()
+
+        print(f"🔎 Detail pages: {len(fetched)}/{len(fetches)} fetched, {len(cached)} reused")
+        self.report.count("detail_pages_fetched", len(fetched))
+        self.report.count("detail_pages_reused", len(cached))
+        return apply_details(df, details)
+
+    def load_streamed_products(self, chunk_size=10_000):
+        """Load the unique product rows written by the ExtractionPipeline during a streaming crawl, in chunks."""
+        if not os.path.exists(self.products_file) or os.path.getsize(self.products_file) == 0:
+            return pd.DataFrame()
+        deduplicator = self.deduplicator()
+        with pd.read_json(self.products_file, lines=True, dtype=False, chunksize=chunk_size) as chunks:
+            frames = list(deduplicator.iter_batches(chunks))
+        return self.finish_dedupe(deduplicator, frames)
 
     def post_process(self, df):
         return PostProcessor().remove_duplicates(df)
 
-    def save_to_excel(self, df):
-        # Add metadata columns
-        df["Date"] = self.date
-        df["Market"] = self.market_country
-        df["Retail"] = self.retailer_url        
-        df["Brand"] = self.brand
-        df["Category"] = self.category
-        df["Search Keywords"] = self.search_term
+    def save_results(self, df):
+        # Rows only reference the run; the writers store the run metadata once next to them
+        if "RunId" not in df.columns:
+            df.insert(0, "RunId", self.run.run_id)
+        for writer in self.writers:
+            writer.write(df, self.run)
 
-        df.to_excel(self.output_excel, index=False)
-        print(f"📁 Data saved to: {self.output_excel}")
+    def save_archived_results(self, df):
+        """Save rows of extract_archived_pages per original fetch, to "reextract" outputs next to the live ones.
+
+        Each fetch keeps its original RunId (or "reextract-<fetch time>" for pages archived before runs
+        were recorded) and the date it was fetched, so re-extracted rows never pose as today's observations.
+        Once saved, the pages are marked as re-extracted with this extractor version.
+        """
+        fetches = df.groupby(["FetchedAt", "SourceRunId"], dropna=False, sort=True) if not df.empty else []
+        for (fetched_at, source_run_id), rows in fetches:
+            fetched = datetime.datetime.fromisoformat(fetched_at)
+            run = RunMetadata(
+                run_id=source_run_id if isinstance(source_run_id, str) else f"reextract-{fetched.strftime('%Y%m%d-%H%M%S')}",
+                date=fetched.date().isoformat(),
+                market=self.market_country,
+                retail=self.retailer_url,
+                brand=self.brand,
+                category=self.category,
+                search_term=self.search_term,
+            )
+            rows = rows.drop(columns=["SourceRunId"]).reset_index(drop=True)
+            rows.insert(0, "RunId", run.run_id)
+            # Output file names carry the fetch date
+            self.date = fetched.strftime("%d/%m/%Y")
+            for writer in self.get_writers(self.output_formats, "reextract"):
+                writer.write(rows, run)
+        page_store = PageStore()
+        page_store.mark_re_extracted(self.archived_pages, self.extractor)
+        page_store.close()
 
     def run_pipeline(self):
         print(f"🔍 Scraping '{self.search_term}' product data (market: {self.retailer_url})...")
         scraped_pages = self.run_scraper()
-        if not scraped_pages:
-            print("⚠️ No valid scraping results, terminating process.")
+        self.process_scraped_pages(scraped_pages)
+        if self.report.error:
+            # Lets a worker mark the job failed rather than done
+            raise RuntimeError(f"Run {self.run.run_id} failed: {self.report.error}")
+
+    def run_retries(self):
+        """Re-fetch only the queued failed pages of this retailer/search term whose backoff has elapsed."""
+        queue = RetryQueue()
+        self.retry_pages = queue.due(self.retailer_url, self.search_term)
+        queue.close()
+        if not self.retry_pages:
+            print(f"✅ No failed pages due for retry ('{self.search_term}', {self.retailer_url}).")
             return
 
-        df = self.extract_data(scraped_pages)
-        print(f"📦 Total products extracted: {len(df)}")
+        print(f"🔁 Re-fetching {len(self.retry_pages)} failed pages of '{self.search_term}' ({self.retailer_url})...")
+        # The recovered pages are not a full snapshot of the search, so they are not diffed against the state
+        self.change_detection = False
+        self.writers = self.get_writers(self.output_formats, "products")
+        self.process_scraped_pages(self.run_scraper())
 
-        df_clean = self.post_process(df)
-        print(f"🧹 Products after removing duplicates: {len(df_clean)}")
-        
-        self.save_to_excel(df_clean)
-
-    def get_spider_and_extractor(self, retailer_url):
-        if retailer_url == "amazon.de":
-            return AmazonSearchSpider, AmazonExtractor()
-        elif retailer_url == "meds.se":
-            return MedsSearchSpider, MedsExtractor()
-        else:
-            raise ValueError(f"Unsupported retailer URL: {retailer_url}")
+    def process_scraped_pages(self, scraped_pages):
+        """Extract, deduplicate and save the pages returned by a crawl."""
+        try:
+            if self.report.error:
+                print(f"⚠️ Run failed ({self.report.error}), nothing is saved.")
+                return
+            if not scraped_pages:
+                print("⚠️ No valid scraping results, terminating process.")
+                return
+
+            df = self.extract_products(scraped_pages)
+            print(f"📦 Total products extracted: {self.extracted_rows}")
+
+            with self.report.stage("post_process"):
+                df_clean = self.post_process(df)
+            print(f"🧹 Products after removing duplicates: {len(df_clean)}")
+            self.report.count("products_unique", len(df_clean))
+
+            if self.detail_pages and not df_clean.empty:
+                with self.report.stage("details"):
+                    df_clean = self.add_product_details(df_clean)
+
+            if self.price_history:
+                with self.report.stage("price_history"):
+                    self.record_prices(df_clean)
+
+            if self.change_detection:
+                with self.report.stage("change_detection"):
+                    df_clean = self.detect_changes(df_clean)
+
+            with self.report.stage("save"):
+                self.save_results(df_clean)
+            self.report.count("rows_saved", len(df_clean))
+        finally:
+            # Raw pages are archived in the PageStore by the time the feed is loaded, so the workspace is
+            # no longer needed, whether the run was saved, had nothing to save or failed
+            shutil.rmtree(self.workspace, ignore_errors=True)
+            self.write_report()
+
+    def write_report(self):
+        if self.report_file:
+            print(f"📈 Run report saved to: {self.report.write_json(self.report_file)}")
+        if self.prometheus_file:
+            self.report.write_prometheus(self.prometheus_file)
+
+    def record_prices(self, df):
+        history = PriceHistory()
+        observations = history.record(df, self.run)
+        history.close()
+        self.report.count("price_observations", observations)
+
+    def detect_changes(self, df):
+        """Diff against the previous run's state and return only the new/removed/changed products.
+
+        The full current snapshot is written next to the change log, replacing the previous one.
+        """
+        # Products on a failed page are missing, not removed; such a run only updates what it saw
+        complete = not self.report.counters.get("pages_failed")
+        detector = ChangeDetector()
+        changes = detector.detect(df, self.run, complete=complete)
+        snapshot = detector.snapshot(self.run.retail, self.run.search_term)
+        detector.close()
+        counts = changes["Change"].value_counts()
+        print(f"🔄 Changes since last run: {counts.get('new', 0)} new, {counts.get('removed', 0)} removed, {counts.get('changed', 0)} changed"
+              + ("" if complete else " (some pages failed, removals are not reported)"))
+        retailer_slug = self.retailer_url.replace('.', '-').lower()
+        snapshot_file = f"./results/snapshots/{retailer_slug}_{self.search_term.replace(' ', '-')}.csv"
+        CsvWriter(snapshot_file, append=False, columns=STATE_DTYPES).write(snapshot, self.run)
+        return changes
+
+    def get_writers(self, output_formats, dataset="products"):
+        retailer_slug = self.retailer_url.replace('.', '-').lower()
+        excel_suffix = "" if dataset == "products" else f"_{dataset.capitalize()}"
+        # Fixed columns per dataset, so appends and parts from different retailers and stages line up
+        columns = {
+            "products": PRODUCT_COLUMNS,
+            "changes": CHANGE_LOG_COLUMNS,
+            "reextract": {**PRODUCT_COLUMNS, "FetchedAt": "string"},
+        }[dataset]
+        writers = []
+        for output_format in output_formats:
+            if output_format == "excel":
+                writers.append(ExcelWriter(f"./results/{retailer_slug}_{self.date.replace('/', '-')}_Brand-{self.brand}_Category-{self.category}{excel_suffix}.xlsx", columns))
+            elif output_format == "csv":
+                writers.append(CsvWriter(f"./results/{retailer_slug}_{dataset}.csv", columns=columns))
+            elif output_format == "parquet":
+                writers.append(ParquetWriter(f"./results/{dataset}", columns))
+            else:
+                raise ValueError(f"Unsupported output format: {output_format}")
+        return writers
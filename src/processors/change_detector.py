@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import pandas as pd
+
+from src.processors.product_identity import product_key
+from src.records import PRODUCT_DTYPES
+
+# Fields whose changes between runs are reported
+TRACKED_FIELDS = ["PriceMinor", "Currency", "Rating", "ReviewsCount"]
+STATE_COLUMNS = ["ProductKey", "Title", "Link"] + TRACKED_FIELDS + ["RunId"]
+# Columns of the change log, in order, with their dtypes
+CHANGE_LOG_COLUMNS = {"RunId": "string", "ProductKey": "string", "Change": "string", "Title": "string", "Link": "string",
+                      **{name: PRODUCT_DTYPES[field] for field in TRACKED_FIELDS for name in (field, f"{field}Prev")}}
+# Columns of the snapshot written next to the change log
+STATE_DTYPES = {column: PRODUCT_DTYPES.get(column, "string") for column in STATE_COLUMNS}
+
+
+def _differs(current, previous):
+    """Element-wise inequality where two missing values count as equal"""
+    current_missing, previous_missing = current.isna(), previous.isna()
+    both_present = ~current_missing & ~previous_missing
+    # Compared as plain Python values, so nullable and object columns never meet pd.NA in a comparison
+    equal = pd.Series(False, index=current.index)
+    equal[both_present] = current[both_present].astype(object).eq(previous[both_present].astype(object))
+    return ~(equal | (current_missing & previous_missing))
+
+
+class ChangeDetector:
+    """Persistent product-state index that diffs each run against the previous one.
+
+    State is kept per retailer and search term, keyed by normalized product identity
+    (ASIN for Amazon, product path otherwise). `detect` returns a compact change log of
+    new, removed and changed products, and replaces the stored state with the current snapshot.
+    A partial run (some search pages failed) can't tell a removed product from one on a missing
+    page: it reports no removals and only updates the products it saw.
+    """
+
+    def __init__(self, db_path="./results/product_state.sqlite"):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS product_state (
+                Retail TEXT NOT NULL,
+                SearchTerm TEXT NOT NULL,
+                {", ".join(STATE_COLUMNS)},
+                PRIMARY KEY (Retail, SearchTerm, ProductKey)
+            )
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def snapshot(self, retailer, search_term):
+        """Current state of every product last seen for this retailer and search term."""
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(STATE_COLUMNS)} FROM product_state WHERE Retail = ? AND SearchTerm = ?",
+            self.conn, params=(retailer, search_term),
+        )
+        return df.astype({column: dtype for column, dtype in PRODUCT_DTYPES.items() if column in df.columns})
+
+    def detect(self, df, run, complete=True):
+        """Diff the run's products against the stored state and return the change log.
+
+        Pass `complete=False` when some search pages of the run failed.
+        """
+        current = df.assign(ProductKey=df["Link"].map(product_key, na_action="ignore"), RunId=run.run_id)
+        current = current.dropna(subset=["ProductKey"]).drop_duplicates(subset=["ProductKey"], keep="first")
+        for column in STATE_COLUMNS:
+            if column not in current.columns:
+                current[column] = pd.Series(pd.NA, index=current.index, dtype=PRODUCT_DTYPES.get(column, "object"))
+        current = current[STATE_COLUMNS]
+
+        previous = self.snapshot(run.retail, run.search_term)
+        merged = current.merge(previous[["ProductKey"] + TRACKED_FIELDS + ["Title", "Link"]], on="ProductKey",
+                               how="outer", suffixes=("", "Prev"), indicator=True)
+
+        changed = pd.Series(False, index=merged.index)
+        for field in TRACKED_FIELDS:
+            changed |= _differs(merged[field], merged[f"{field}Prev"])
+        merged["Change"] = None
+        merged.loc[merged["_merge"] == "left_only", "Change"] = "new"
+        if complete:
+            merged.loc[merged["_merge"] == "right_only", "Change"] = "removed"
+        merged.loc[(merged["_merge"] == "both") & changed, "Change"] = "changed"
+
+        # Removed products keep their last known title and link
+        removed = merged["Change"] == "removed"
+        merged.loc[removed, "Title"] = merged.loc[removed, "TitlePrev"]
+        merged.loc[removed, "Link"] = merged.loc[removed, "LinkPrev"]
+
+        changes = merged[merged["Change"].notna()].assign(RunId=run.run_id)
+        changes = changes[list(CHANGE_LOG_COLUMNS)].reset_index(drop=True)
+
+        self._replace_state(run.retail, run.search_term, current, keep_unseen=not complete)
+        return changes
+
+    def _replace_state(self, retailer, search_term, current, keep_unseen=False):
+        rows = current.astype(object).where(current.notna(), None).itertuples(index=False, name=None)
+        with self.conn:
+            if not keep_unseen:
+                self.conn.execute("DELETE FROM product_state WHERE Retail = ? AND SearchTerm = ?", (retailer, search_term))
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO product_state VALUES (?, ?, {', '.join('?' for _ in STATE_COLUMNS)})",
+                ((retailer, search_term) + row for row in rows),
+            )
@@ -1,12 +1,124 @@
+import os
+import shutil
+import tempfile
+from itertools import islice
+
+import numpy as np
 import pandas as pd
 
+from src.processors.product_identity import product_key
+
 class PostProcessor:
     def remove_duplicates(self, df, subset=None):
         """Remove duplicate entries from the DataFrame based on a subset of columns.
-        Default subset is ['Link'] to ensure unique products.
+        By default products are unique by their normalized identity (ASIN, or canonical link without tracking parameters),
+        so sponsored and organic links or different ref parameters of one product count once.
         """
         if subset is None:
-            subset = ["Link"]
+            keys = df["Link"].map(product_key, na_action="ignore")
+            deduped_df = df[~keys.duplicated(keep="first")].reset_index(drop=True)
+            return deduped_df
         # Drop duplicates and keep the first occurrence of each unique subset value
         deduped_df = df.drop_duplicates(subset=subset, keep="first").reset_index(drop=True)
         return deduped_df
+
+
+class KeyHashSet:
+    """Compact set of 64-bit key hashes, 8 bytes per key.
+
+    Hashes are kept in sorted runs of numpy arrays; a run is merged into the previous one unless that
+    is more than twice as large, so there are O(log n) runs and lookups are binary searches. With `spill_dir`, runs that reach
+    `spill_threshold` keys are written to .npy files and memory-mapped instead of being merged
+    further: memory stays bounded by the threshold however many keys are added.
+    """
+
+    def __init__(self, spill_dir=None, spill_threshold=1_000_000):
+        self.spill_dir = spill_dir
+        self.spill_threshold = spill_threshold
+        # Sorted, disjoint uint64 arrays; spilled runs first, then in-memory runs by decreasing size
+        self.spilled = []
+        self.runs = []
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self):
+        return sum(len(run) for run in self.spilled + self.runs)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.spilled + self.runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+
+    def add(self, hashes):
+        """Add the hashes and return a mask of the positions that are new (first occurrence only)."""
+        unique, first_positions = np.unique(hashes, return_index=True)
+        known = self.contains(unique)
+        new = np.zeros(len(hashes), dtype=bool)
+        new[first_positions[~known]] = True
+        if not known.all():
+            self._push(unique[~known])
+        return new
+
+    def _push(self, run):
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            run = np.sort(np.concatenate([self.runs.pop(), run]), kind="mergesort")
+        if self.spill_dir and len(run) >= self.spill_threshold:
+            path = os.path.join(self.spill_dir, f"keys_{len(self.spilled)}.npy")
+            np.save(path, run)
+            self.spilled.append(np.load(path, mmap_mode="r"))
+        else:
+            self.runs.append(run)
+
+
+def key_hashes(keys):
+    """64-bit hashes of product keys; missing keys hash alike, as in remove_duplicates"""
+    return pd.util.hash_array(np.asarray(pd.Series(keys, dtype="object").fillna(""), dtype=object))
+
+
+class StreamingDeduplicator:
+    """Drops duplicate products across row batches without holding all rows in memory.
+
+    Rows are unique by the same normalized identity as PostProcessor.remove_duplicates and the
+    first occurrence is kept. Only a 64-bit hash per unique product is remembered (a collision
+    needs billions of products to become likely), and with `spill_dir` even those move to disk.
+    Feed it DataFrame batches with `filter`, or a generator of batches with `iter_batches`.
+    """
+
+    def __init__(self, spill_dir=None, spill_threshold=1_000_000):
+        self.own_spill_dir = spill_dir is True
+        if self.own_spill_dir:
+            spill_dir = tempfile.mkdtemp(prefix="dedupe_")
+        self.seen = KeyHashSet(spill_dir or None, spill_threshold)
+        self.rows_in = 0
+        self.rows_out = 0
+
+    def filter(self, batch):
+        """The rows of the batch whose product was not seen before."""
+        self.rows_in += len(batch)
+        if batch.empty:
+            return batch
+        keys = batch["Link"].map(product_key, na_action="ignore") if "Link" in batch.columns else [None] * len(batch)
+        unique = batch[self.seen.add(key_hashes(keys))]
+        self.rows_out += len(unique)
+        return unique
+
+    def iter_batches(self, batches):
+        for batch in batches:
+            unique = self.filter(batch)
+            if not unique.empty:
+                yield unique
+
+    def iter_rows(self, rows, batch_size=10_000):
+        """Unique rows of an iterable of product dicts, hashed in batches."""
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield from self.filter(pd.DataFrame(batch)).to_dict("records")
+
+    def close(self):
+        if self.own_spill_dir:
+            shutil.rmtree(self.seen.spill_dir, ignore_errors=True)
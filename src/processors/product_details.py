@@ -0,0 +1,106 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import pandas as pd
+
+from src.processors.product_identity import canonical_url, extract_asin, product_key
+from src.records import PRODUCT_DTYPES
+
+# Card fields that decide whether a detail page has to be fetched again. Links are left out, they
+# carry per-request tracking parameters on sponsored results
+CARD_FIELDS = ["Title", "PriceMinor", "Currency", "Rating", "ReviewsCount", "PackSize"]
+
+
+def card_fingerprint(row):
+    """Stable hash of the search-card fields of a product row"""
+    values = [None if pd.isna(row.get(field)) else str(row.get(field)) for field in CARD_FIELDS]
+    return hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()
+
+
+def detail_url(link, base_http_url):
+    """Canonical detail page URL: /dp/<ASIN> for Amazon, the link without tracking parameters otherwise.
+
+    The same product always maps to the same URL, so the HTTP cache and ETag revalidation work across runs.
+    """
+    asin = extract_asin(link)
+    return f"{base_http_url}/dp/{asin}" if asin else canonical_url(link)
+
+
+class ProductDetailStore:
+    """Detail-page fields per product, stored with the fingerprint of the search card they belong to.
+
+    Lives in the same database as the ChangeDetector state. Products whose card is unchanged since
+    the last run reuse their stored details, so only new or changed products cost a detail request.
+    """
+
+    def __init__(self, db_path="./results/product_state.sqlite"):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_details (
+                Retail TEXT NOT NULL,
+                ProductKey TEXT NOT NULL,
+                CardHash TEXT NOT NULL,
+                Details TEXT NOT NULL,
+                FetchedAt TEXT NOT NULL,
+                PRIMARY KEY (Retail, ProductKey)
+            )
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def plan(self, df, retailer, base_http_url):
+        """Split products into detail pages to fetch and details that can be reused.
+
+        Returns (fetches, cached): fetches are dicts with "ProductKey", "url" and "CardHash",
+        cached maps product key to its stored details.
+        """
+        stored = {
+            key: (card_hash, json.loads(details))
+            for key, card_hash, details in self.conn.execute(
+                "SELECT ProductKey, CardHash, Details FROM product_details WHERE Retail = ?", (retailer,)
+            )
+        }
+        fetches, cached, seen = [], {}, set()
+        for row in df.to_dict("records"):
+            link = row.get("Link")
+            key = product_key(link) if isinstance(link, str) else None
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            card_hash = card_fingerprint(row)
+            if key in stored and stored[key][0] == card_hash:
+                cached[key] = stored[key][1]
+            else:
+                fetches.append({"ProductKey": key, "url": detail_url(link, base_http_url), "CardHash": card_hash})
+        return fetches, cached
+
+    def save(self, retailer, fetched):
+        """Store (product key, card hash, details) tuples of freshly fetched detail pages."""
+        fetched_at = datetime.datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO product_details VALUES (?, ?, ?, ?, ?)",
+                ((retailer, key, card_hash, json.dumps(details, ensure_ascii=False), fetched_at)
+                 for key, card_hash, details in fetched),
+            )
+
+
+def apply_details(df, details):
+    """Overlay detail-page values (dict of product key -> fields) on the card values; missing ones keep the card value."""
+    if not details:
+        return df
+    keys = df["Link"].map(product_key, na_action="ignore")
+    detail_frame = pd.DataFrame.from_dict(details, orient="index")
+    df = df.copy()
+    for column in detail_frame.columns:
+        values = keys.map(detail_frame[column].dropna())
+        if column in df.columns:
+            values = values.where(values.notna(), df[column])
+        df[column] = values.astype(PRODUCT_DTYPES[column]) if column in PRODUCT_DTYPES else values
+    return df
@@ -0,0 +1,48 @@
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, unquote, urlencode, urlparse, urlunparse
+
+_asin_pattern = re.compile(r"/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?:[/?&]|$)")
+# Query parameters that only track the click (campaign, search position, session) and never change the product
+_tracking_params = re.compile(
+    r"^(utm_.*|ref|ref_|tag|qid|sr|crid|sprefix|keywords|th|psc|smid|spla|content-id|pd_rd_.*|pf_rd_.*|gclid|fbclid|dib|dib_tag)$",
+    re.IGNORECASE,
+)
+
+
+def extract_asin(link: Optional[str]) -> Optional[str]:
+    """Find the ASIN in an Amazon product link, including links wrapped in sponsored redirects"""
+    if not link:
+        return None
+    # Sponsored links carry the product URL percent-encoded in a query parameter
+    match = _asin_pattern.search(unquote(link))
+    return match.group(1) if match else None
+
+
+def product_key(link: Optional[str]) -> Optional[str]:
+    """Normalized product identity: the ASIN for Amazon, otherwise the canonical_url without scheme
+    (host + path, plus any non-tracking query), so dedupe and matching always agree"""
+    if not link:
+        return None
+    asin = extract_asin(link)
+    if asin:
+        return asin
+    parsed = urlparse(canonical_url(link))
+    key = f"{parsed.netloc}{parsed.path.rstrip('/')}"
+    return f"{key}?{parsed.query}" if parsed.query else key
+
+
+def canonical_url(link: Optional[str]) -> Optional[str]:
+    """Stable product URL: https://<amazon host>/dp/<ASIN> for Amazon, otherwise the link without
+    tracking parameters, fragment and Amazon's /ref=... path suffix"""
+    if not link:
+        return None
+    parsed = urlparse(link)
+    host = parsed.netloc.lower()
+    asin = extract_asin(link)
+    if asin:
+        return f"https://{host}/dp/{asin}"
+    path = re.sub(r"/ref=[^/]*$", "", parsed.path).rstrip("/") or "/"
+    query = urlencode([(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                       if not _tracking_params.match(key)])
+    return urlunparse((parsed.scheme.lower() or "https", host, path, "", query, ""))
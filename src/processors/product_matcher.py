@@ -0,0 +1,208 @@
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+
+from src.processors.product_identity import canonical_url, product_key
+
+# Filler words of the retailers' languages (de, sv, en); they never identify a product
+STOPWORDS = {
+    "und", "mit", "für", "fur", "der", "die", "das", "von", "aus", "zum", "zur",
+    "och", "med", "för", "for", "av", "till", "som", "den", "det",
+    "and", "with", "the", "of", "in", "to", "a", "an", "by",
+}
+
+_pack_patterns = [
+    re.compile(r"\b(\d{1,3})\s*(?:-|er)?\s*(?:pack|pk|pcs|pieces|stück|stk|st|count|ct)\b"),
+    re.compile(r"\b(?:pack|set|packung|förpackning)\s+(?:of|à|a|med|mit|von)?\s*(\d{1,3})\b"),
+    re.compile(r"\b(\d{1,3})\s*x\b"),
+    # German "1er", "6er" without a following "Pack"
+    re.compile(r"\b(\d{1,3})er\b"),
+]
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Unicode-normalized lowercase text with punctuation replaced by spaces"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return re.sub(r"[^\w]+", " ", text).strip()
+
+
+def parse_pack_count(*texts: Optional[str]) -> Optional[int]:
+    """Number of items in the pack ("2er Pack", "1er", "2-pack", "2 st", "Pack of 2", "2 x"), if stated"""
+    for text in texts:
+        normalized = normalize_text(text)
+        for pattern in _pack_patterns:
+            match = pattern.search(normalized)
+            if match:
+                return int(match.group(1))
+    return None
+
+
+def title_tokens(title: Optional[str]) -> Set[str]:
+    """Distinctive title tokens: no stopwords, no single characters and no bare pack-size numbers"""
+    return {token for token in normalize_text(title).split()
+            if len(token) > 1 and token not in STOPWORDS and not token.isdigit()}
+
+
+class _UnionFind:
+    """Disjoint sets that also track the known pack count and brand of each cluster (on its root)"""
+
+    def __init__(self, pack_counts, brands):
+        self.parent = list(range(len(pack_counts)))
+        self.attributes = [list(pack_counts), list(brands)]
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def compatible(self, left, right):
+        """False if the two clusters have different known pack counts or brands"""
+        left, right = self.find(left), self.find(right)
+        return all(values[left] is None or values[right] is None or values[left] == values[right]
+                   for values in self.attributes)
+
+    def union(self, left, right):
+        left, right = self.find(left), self.find(right)
+        if left != right:
+            root, child = min(left, right), max(left, right)
+            self.parent[child] = root
+            for values in self.attributes:
+                if values[root] is None:
+                    values[root] = values[child]
+
+
+class ProductMatcher:
+    """Matches the same product across retailers and runs without comparing every pair.
+
+    Rows with the same canonical identity (ASIN, or URL without tracking parameters) are matched
+    directly, and so are rows with the same title tokens. Other candidates come from a blocked
+    inverted index on the rarest tokens of each distinct title: only titles that share such a token,
+    and that token is rare enough (in at most `max_block_size` distinct titles), are compared. Each
+    title is compared with a bounded number of others, so the cost grows linearly with the number
+    of rows. Candidates are scored by IDF-weighted token overlap; different pack counts or brands
+    never match, not even through a third row. Matches are grouped into a MatchId.
+    """
+
+    def __init__(self, threshold: float = 0.6, max_block_size: int = 20, brand_column: Optional[str] = "Brand"):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.brand_column = brand_column
+
+    def match(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return a copy of `df` with CanonicalUrl, ProductKey, PackCount and MatchId columns.
+
+        Dataset rows only reference their run, so join the run metadata (read_runs) first for the
+        brand column; pass brand_column=None to match without the brand veto.
+        """
+        if self.brand_column is not None and self.brand_column not in df.columns:
+            raise ValueError(f"Column {self.brand_column!r} not found; join the run metadata on RunId "
+                             f"or use brand_column=None")
+        df = df.reset_index(drop=True).copy()
+        links = df["Link"] if "Link" in df.columns else pd.Series(None, index=df.index, dtype="object")
+        titles = df["Title"].astype("object").where(df["Title"].notna(), None).tolist()
+        pack_sizes = df["PackSize"].astype("object").where(df["PackSize"].notna(), None).tolist() \
+            if "PackSize" in df.columns else [None] * len(df)
+        brands = [normalize_text(brand) or None for brand in df[self.brand_column].astype("object").where(
+            df[self.brand_column].notna(), None)] if self.brand_column is not None else [None] * len(df)
+
+        df["CanonicalUrl"] = links.map(canonical_url, na_action="ignore")
+        df["ProductKey"] = links.map(product_key, na_action="ignore")
+        pack_counts = [parse_pack_count(pack_size, title) for pack_size, title in zip(pack_sizes, titles)]
+        df["PackCount"] = pd.array(pack_counts, dtype="Int64")
+
+        groups = _UnionFind(pack_counts, brands)
+        # Same canonical identity: the same product, whatever the title says
+        first_by_key: Dict[str, int] = {}
+        for row, key in enumerate(df["ProductKey"]):
+            if isinstance(key, str):
+                groups.union(first_by_key.setdefault(key, row), row)
+
+        # Best pairs first. The vetoes are checked against whole clusters, so a row without a pack count
+        # can't bridge a 1-pack and a 6-pack into one group
+        tokens = [title_tokens(title) for title in titles]
+        # Rows with the same title tokens, pack count and brand score 1.0 with each other, so only one of them
+        # takes part in the title matching: repeated runs of a product neither crowd the blocks nor make its
+        # tokens look common
+        representatives: Dict[tuple, int] = {}
+        pairs = []
+        for row, row_tokens in enumerate(tokens):
+            if row_tokens:
+                representative = representatives.setdefault((frozenset(row_tokens), pack_counts[row], brands[row]), row)
+                if representative != row:
+                    pairs.append((representative, row, 1.0))
+        distinct = list(representatives.values())
+        pairs += [(distinct[left], distinct[right], score) for left, right, score in self.candidate_pairs(
+            [tokens[row] for row in distinct], [pack_counts[row] for row in distinct], [brands[row] for row in distinct])]
+        pairs.sort(key=lambda pair: -pair[2])
+        for left, right, _ in pairs:
+            if groups.compatible(left, right):
+                groups.union(left, right)
+
+        roots = [groups.find(row) for row in range(len(df))]
+        # Dense ids in order of first appearance
+        match_ids: Dict[int, int] = {}
+        df["MatchId"] = [match_ids.setdefault(root, len(match_ids)) for root in roots]
+        return df
+
+    def candidate_pairs(self, tokens: List[Set[str]], pack_counts: List[Optional[int]], brands: List[Optional[str]]):
+        """Yield (left, right, score) for every candidate pair scoring at least the threshold."""
+        document_frequency = Counter(token for row_tokens in tokens for token in row_tokens)
+        row_count = max(len(tokens), 1)
+        idf = {token: math.log(1 + row_count / frequency) for token, frequency in document_frequency.items()}
+        weights = [sum(idf[token] for token in row_tokens) for row_tokens in tokens]
+        threshold = self.threshold
+
+        # Blocking with prefix filtering: a pair scoring at least the threshold shares tokens worth at least
+        # threshold * weight of either row. With every row's tokens ordered rarest first, the first token they
+        # share lies within both rows' prefixes: the rarest tokens up to the point where the remaining ones
+        # weigh less than that. Only prefix tokens that are rare enough are indexed, and each row is compared
+        # with the earlier rows of its blocks, at most `max_block_size` per prefix token
+        blocks = defaultdict(list)
+        # Row last compared with each row, so rows sharing several prefix tokens are scored once
+        last_seen = [-1] * len(tokens)
+        for right, row_tokens in enumerate(tokens):
+            weight = weights[right]
+            remaining = weight
+            prefix = []
+            for token in sorted(row_tokens, key=lambda token: (document_frequency[token], token)):
+                if remaining < threshold * weight * (1 - 1e-9):
+                    break
+                prefix.append(token)
+                remaining -= idf[token]
+
+            for token in prefix:
+                if document_frequency[token] > self.max_block_size:
+                    continue
+                block = blocks[token]
+                for left in block:
+                    if last_seen[left] == right:
+                        continue
+                    last_seen[left] = right
+                    if pack_counts[left] is not None and pack_counts[right] is not None and pack_counts[left] != pack_counts[right]:
+                        continue
+                    if brands[left] and brands[right] and brands[left] != brands[right]:
+                        continue
+                    # The score can't reach the threshold if one row outweighs the other too much
+                    if weights[left] < threshold * weight or weight < threshold * weights[left]:
+                        continue
+                    # Weighted Jaccard over the full token sets, common tokens included
+                    common = sum(idf[token] for token in tokens[left] & row_tokens)
+                    union = weights[left] + weight - common
+                    score = common / union if union else 0.0
+                    if score >= threshold:
+                        yield left, right, score
+                block.append(right)
+
+
+def price_comparison(matched: pd.DataFrame, retailer_column: str = "retail") -> pd.DataFrame:
+    """One row per matched product with its lowest price (minor units) at each retailer."""
+    titles = matched.groupby("MatchId")["Title"].first()
+    prices = matched.pivot_table(index="MatchId", columns=retailer_column, values="PriceMinor", aggfunc="min")
+    return pd.concat([titles, prices], axis=1).reset_index()
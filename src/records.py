@@ -0,0 +1,113 @@
+import re
+from typing import Dict, Iterable, Optional
+import pandas as pd
+
+# Column types of extracted product rows; prices are integers in minor units (cents, öre)
+PRODUCT_DTYPES = {
+    "Title": "string",
+    "PriceMinor": "Int64",
+    "Currency": "string",
+    "Rating": "Float64",
+    "ReviewsCount": "Int64",
+    "PackSize": "string",
+    "Link": "string",
+    "Image": "string",
+}
+
+# Columns of the product outputs, in order: every CSV append and Parquet part has all of them,
+# whichever fields the retailer's extractor (or the detail stage) filled in
+PRODUCT_COLUMNS = {"RunId": "string", **PRODUCT_DTYPES}
+
+CURRENCY_CODES = {
+    "€": "EUR",
+    "eur": "EUR",
+    "$": "USD",
+    "usd": "USD",
+    "£": "GBP",
+    "gbp": "GBP",
+    "kr": "SEK",
+    "sek": "SEK",
+}
+
+_number_pattern = re.compile(r"\d[\d.,\s  ]*")
+
+
+def parse_price(text: Optional[str]) -> Optional[int]:
+    """Parse a price such as "1.234,56 €", "€1,234.56" or "129,00 kr" into minor units (123456).
+
+    When both separators appear the last one is the decimal separator; a single separator
+    followed by exactly three digits is a thousands separator ("1.234" -> 1234.00).
+    """
+    if not text:
+        return None
+    match = _number_pattern.search(text)
+    if not match:
+        return None
+    number = re.sub(r"[\s  ]", "", match.group(0)).rstrip(".,")
+    last_separator = max(number.rfind("."), number.rfind(","))
+    if last_separator == -1:
+        return int(number) * 100
+
+    head, separator, decimals = number[:last_separator], number[last_separator], number[last_separator + 1:]
+    other_separator = "," if separator == "." else "."
+    if len(decimals) == 3 and other_separator not in head:
+        # "1.234" / "1,234,567": the only separator in use groups thousands
+        return int(re.sub(r"[.,]", "", number)) * 100
+    return int(re.sub(r"[.,]", "", head) or "0") * 100 + int(decimals.ljust(2, "0")[:2])
+
+
+def parse_currency(text: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    """Map a currency symbol or code found in `text` to its ISO 4217 code."""
+    if text:
+        lowered = text.lower()
+        for symbol, code in CURRENCY_CODES.items():
+            if symbol in lowered:
+                return code
+    return default
+
+
+def parse_rating(text: Optional[str]) -> Optional[float]:
+    """Parse the leading number of "4,5 von 5 Sternen" / "4.5 out of 5 stars"."""
+    match = re.search(r"\d+(?:[.,]\d+)?", text or "")
+    return float(match.group(0).replace(",", ".")) if match else None
+
+
+def parse_count(text: Optional[str]) -> Optional[int]:
+    """Parse a count such as "1,234", "1.234" or "(1 234)"."""
+    digits = re.sub(r"\D", "", text or "")
+    return int(digits) if digits else None
+
+
+def to_frame(products: Iterable[Dict]) -> pd.DataFrame:
+    """Build a DataFrame of product rows with typed (numeric, nullable) columns."""
+    df = pd.DataFrame(products)
+    return df.astype({column: dtype for column, dtype in PRODUCT_DTYPES.items() if column in df.columns})
+
+
+class RunMetadata:
+    """Metadata shared by every row of a run; stored once per run and referenced by RunId."""
+
+    __slots__ = ("run_id", "date", "market", "retail", "brand", "category", "search_term")
+
+    def __init__(self, run_id, date, market, retail, brand, category, search_term):
+        self.run_id = run_id
+        self.date = date
+        self.market = market
+        self.retail = retail
+        self.brand = brand
+        self.category = category
+        self.search_term = search_term
+
+    def to_dict(self):
+        return {
+            "RunId": self.run_id,
+            "Date": self.date,
+            "Market": self.market,
+            "Retail": self.retail,
+            "Brand": self.brand,
+            "Category": self.category,
+            "Search Keywords": self.search_term,
+        }
+
+    def to_frame(self):
+        return pd.DataFrame([self.to_dict()])
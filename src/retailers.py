@@ -0,0 +1,68 @@
+import importlib
+
+
+class Retailer:
+    """A supported retailer, declared as metadata; its spider and extractors are imported on first use.
+
+    Classes are given as dotted paths ("package.module.ClassName"), so the registry itself is
+    cheap to import and tasks that never crawl don't pay for Scrapy or Twisted.
+    """
+
+    __slots__ = ("domain", "market", "currency", "spider", "extractor", "detail_extractor")
+
+    def __init__(self, domain, market, currency, spider, extractor, detail_extractor=None):
+        self.domain = domain
+        self.market = market
+        self.currency = currency
+        self.spider = spider
+        self.extractor = extractor
+        self.detail_extractor = detail_extractor
+
+    def load_spider(self):
+        return _load(self.spider)
+
+    def load_extractor(self):
+        return _load(self.extractor)()
+
+    def load_detail_extractor(self):
+        if self.detail_extractor is None:
+            raise ValueError(f"No detail extractor for {self.domain}")
+        return _load(self.detail_extractor)()
+
+
+def _load(path):
+    module_name, class_name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+RETAILERS = {}
+
+
+def register(retailer):
+    """Add (or replace) a retailer, e.g. from a plugin module."""
+    RETAILERS[retailer.domain] = retailer
+    return retailer
+
+
+def get_retailer(domain):
+    if domain not in RETAILERS:
+        raise ValueError(f"Unsupported retailer URL: {domain}, allowed: {list(RETAILERS)}")
+    return RETAILERS[domain]
+
+
+register(Retailer(
+    domain="amazon.de",
+    market="Germany",
+    currency="EUR",
+    spider="src.scrapers.amazon_search_spider.AmazonSearchSpider",
+    extractor="src.extractors.amazon_extractor.AmazonExtractor",
+    detail_extractor="src.extractors.amazon_extractor.AmazonDetailExtractor",
+))
+register(Retailer(
+    domain="meds.se",
+    market="Sweden",
+    currency="SEK",
+    spider="src.scrapers.meds_spider.MedsSearchSpider",
+    extractor="src.extractors.meds_extractor.MedsExtractor",
+    detail_extractor="src.extractors.meds_extractor.MedsDetailExtractor",
+))
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage
+    resource = None
+
+
+def peak_rss_bytes():
+    """Peak resident memory of this process, or None where it can't be measured."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def field_hit_rates(df, fields):
+    """Share of rows where each extractor field has a value; a drop points at selector rot."""
+    if df.empty:
+        return {}
+    return {field: round(float(df[field].notna().mean()), 4) if field in df.columns else 0.0 for field in fields}
+
+
+class RunReport:
+    """Structured metrics of one pipeline run: stage timings, counters, field hit rates and Scrapy stats.
+
+    Written as JSON (and optionally Prometheus text exposition format) when the run finishes.
+    """
+
+    def __init__(self, run):
+        self.run = run
+        self.started_at = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.field_hit_rates = {}
+        self.scrapy_stats = {}
+        # Set when a stage failed, e.g. the detail crawl; the report then marks the run as failed
+        self.error = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = round(self.stages.get(name, 0.0) + seconds, 4)
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def add_scrapy_stats(self, crawl_name, stats):
+        self.scrapy_stats[crawl_name] = stats
+
+    def to_dict(self):
+        return {
+            "run": self.run.to_dict(),
+            "status": "failed" if self.error else "ok",
+            "error": self.error,
+            "wall_seconds": round(time.time() - self.started_at, 4),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": self.stages,
+            "counters": self.counters,
+            "field_hit_rates": self.field_hit_rates,
+            "throughput": self.throughput(),
+            "scrapy": self.scrapy_stats,
+        }
+
+    def throughput(self):
+        """Pages and bytes per second of each crawl, from the Scrapy stats."""
+        throughput = {}
+        for crawl_name, stats in self.scrapy_stats.items():
+            elapsed = stats.get("elapsed_time_seconds")
+            if not elapsed:
+                continue
+            throughput[crawl_name] = {
+                "pages_per_second": round(stats.get("response_received_count", 0) / elapsed, 4),
+                "bytes_per_second": round(stats.get("downloader/response_bytes", 0) / elapsed, 2),
+            }
+        return throughput
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2, ensure_ascii=False, default=str))
+        return path
+
+    def write_prometheus(self, path):
+        """Prometheus text format, e.g. for node_exporter's textfile collector."""
+        labels = f'retailer="{_escape(self.run.retail)}",search_term="{_escape(self.run.search_term)}"'
+        report = self.to_dict()
+        lines = [
+            "# TYPE pricescraper_run_timestamp_seconds gauge",
+            f"pricescraper_run_timestamp_seconds{{{labels}}} {self.started_at:.0f}",
+            "# TYPE pricescraper_run_wall_seconds gauge",
+            f"pricescraper_run_wall_seconds{{{labels}}} {report['wall_seconds']}",
+            "# TYPE pricescraper_stage_seconds gauge",
+        ]
+        lines += [f'pricescraper_stage_seconds{{{labels},stage="{stage}"}} {seconds}' for stage, seconds in self.stages.items()]
+        lines.append("# TYPE pricescraper_field_hit_rate gauge")
+        lines += [f'pricescraper_field_hit_rate{{{labels},field="{field}"}} {rate}' for field, rate in self.field_hit_rates.items()]
+        if report["peak_rss_bytes"] is not None:
+            lines += ["# TYPE pricescraper_peak_rss_bytes gauge", f"pricescraper_peak_rss_bytes{{{labels}}} {report['peak_rss_bytes']}"]
+        for name, value in self.counters.items():
+            if isinstance(value, (int, float)):
+                metric = f"pricescraper_{_metric_name(name)}"
+                lines += [f"# TYPE {metric} gauge", f"{metric}{{{labels}}} {value}"]
+        for crawl_name, stats in self.scrapy_stats.items():
+            for name, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'pricescraper_scrapy_{_metric_name(name)}{{{labels},crawl="{crawl_name}"}} {value}')
+        _write_atomic(path, "\n".join(lines) + "\n")
+        return path
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name).strip("_").lower()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Scrapers of metrics files may read at any time; never expose a half-written file
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
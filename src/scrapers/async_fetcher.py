@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from urllib.parse import quote, urlparse
+
+from scrapy.http import HtmlResponse
+
+from src.scrapers.throttle import is_blocked
+from src.storage.rate_budget import RateBudget, budget_domain
+
+try:
+    import aiohttp
+except ImportError:  # optional: only the asyncio fetch backend needs it
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+# Scrapy's RetryMiddleware defaults
+RETRY_HTTP_CODES = {500, 502, 503, 504, 522, 524, 408, 429}
+
+
+class _DomainSlot:
+    """Per-domain request spacing: AutoThrottle's latency-based delay plus the blocked-response backoff."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.last_request = 0.0
+        self.lock = asyncio.Lock()
+
+
+class AsyncFetcher:
+    """Fetch backend on asyncio and a pooled keep-alive aiohttp session, for small on-demand crawls.
+
+    Crawls a SearchSpider subclass with the same contract as a Scrapy crawl: the spider's
+    `page_url`, pagination and page-status rules, its USER_AGENT, DOWNLOAD_DELAY / AutoThrottle
+    limits and retries, and the same page items ("page_number", "url", "status", "html" or
+    "reason"). Unlike a CrawlerProcess it can be used any number of times in one process: keep
+    one fetcher open in a long-running service and share it between concurrent crawls, which
+    then share its connections and per-domain delays.
+
+        async with AsyncFetcher() as fetcher:
+            pages, stats = await fetcher.crawl(AmazonSearchSpider, base_url="amazon.de", search_term="BIBS")
+    """
+
+    def __init__(self, max_connections=20, max_connections_per_host=2, timeout=30, rate_budgets=None,
+                 rate_budget_db="./temp/rate_budget.sqlite"):
+        if aiohttp is None:
+            raise ImportError("The asyncio fetch backend requires aiohttp: pip install aiohttp")
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        # Requests per minute per retailer domain, shared with Scrapy crawls and workers using the same database
+        self.rate_budgets = rate_budgets or {}
+        self.rate_budget_db = rate_budget_db
+        self.budget = None
+        self.session = None
+        self.slots = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.budget is not None:
+            self.budget.close()
+            self.budget = None
+
+    def _session(self):
+        # Created on first use, inside the running event loop
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections_per_host,
+                                             keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def crawl(self, spider_cls, **spider_kwargs):
+        """Crawl one search and return its page items and Scrapy-style stats."""
+        spider = spider_cls(**spider_kwargs)
+        settings = spider_cls.custom_settings
+        stats = {"start_time": time.time()}
+        pages = []
+
+        if spider.retry_pages:
+            targets = [(int(page["page_number"]), page["url"]) for page in spider.retry_pages]
+        else:
+            targets = [(1, spider.page_url(1))]
+        fetched = set()
+        for page_number, url in targets:
+            # Pages of one search are fetched one after another, following the pagination. As in
+            # SearchSpider.parse, a recovered retry page continues to the next page too
+            while page_number not in fetched:
+                fetched.add(page_number)
+                item, response = await self.fetch_page(spider, settings, page_number, url, stats)
+                pages.append(item)
+                stats[f"pages/{item['status']}"] = stats.get(f"pages/{item['status']}", 0) + 1
+                if item["status"] != "ok" or page_number >= spider.max_pages or spider.is_last_page(response, page_number):
+                    break
+                page_number += 1
+                url = spider.page_url(page_number)
+
+        stats["elapsed_time_seconds"] = round(time.time() - stats.pop("start_time"), 4)
+        return pages, stats
+
+    async def fetch_page(self, spider, settings, page_number, url, stats):
+        """Fetch one search page with the spider's retries; returns its item and the last response."""
+        max_retries = settings.get("RETRY_TIMES", 2)
+        fetch_url = f"{spider.replay_url}/page?url={quote(url, safe='')}" if spider.replay_url else url
+        slot = self._slot(urlparse(url).netloc, settings)
+        headers = {"User-Agent": settings["USER_AGENT"]}
+
+        for attempt in range(max_retries + 1):
+            if attempt:
+                stats["retry/count"] = stats.get("retry/count", 0) + 1
+            await self._wait_for_slot(slot, urlparse(url).netloc, stats)
+            started = time.monotonic()
+            stats["downloader/request_count"] = stats.get("downloader/request_count", 0) + 1
+            try:
+                async with self._session().get(fetch_url, headers=headers) as http_response:
+                    body = await http_response.read()
+                    status = http_response.status
+                    response_headers = {key: value for key, value in http_response.headers.items()}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                reason = type(error).__name__
+                logger.warning(f"Page {url} attempt {attempt + 1} failed: {reason}")
+                continue
+
+            stats["response_received_count"] = stats.get("response_received_count", 0) + 1
+            stats["downloader/response_bytes"] = stats.get("downloader/response_bytes", 0) + len(body)
+            stats[f"downloader/response_status_count/{status}"] = stats.get(f"downloader/response_status_count/{status}", 0) + 1
+            self._adjust_delay(slot, settings, status, body, time.monotonic() - started, stats)
+
+            if status >= 400:
+                reason = f"http_{status}"
+                if status in RETRY_HTTP_CODES:
+                    continue
+                break
+            response = HtmlResponse(url, status=status, headers=response_headers, body=body)
+            page_status = spider.page_status(response, page_number)
+            if page_status == "ok":
+                return {"page_number": str(page_number), "url": url, "status": "ok", "html": response.text}, response
+            if attempt == max_retries:
+                logger.warning(f"Page {page_number} is {page_status}, giving up on it for this run")
+                return {"page_number": str(page_number), "url": url, "status": page_status}, response
+
+        logger.warning(f"Page {url} failed: {reason}")
+        return {"page_number": str(page_number), "url": url, "status": "failed", "reason": reason}, None
+
+    def _slot(self, netloc, settings):
+        if netloc not in self.slots:
+            self.slots[netloc] = _DomainSlot(max(settings.get("AUTOTHROTTLE_START_DELAY", 0), settings.get("DOWNLOAD_DELAY", 0)))
+        return self.slots[netloc]
+
+    async def _wait_for_slot(self, slot, netloc, stats):
+        domain = budget_domain(netloc)
+        rate = self.rate_budgets.get(domain)
+        while rate:
+            if self.budget is None:
+                self.budget = RateBudget(self.rate_budget_db)
+            wait = self.budget.acquire(domain, rate)
+            if wait <= 0:
+                break
+            stats["throttle/budget_waits"] = stats.get("throttle/budget_waits", 0) + 1
+            await asyncio.sleep(wait)
+
+        # One request at a time per domain, at least `delay` apart
+        async with slot.lock:
+            wait = slot.last_request + slot.delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            slot.last_request = time.monotonic()
+
+    def _adjust_delay(self, slot, settings, status, body, latency, stats):
+        """AutoThrottle's delay update, and the AdaptiveBackoffMiddleware's backoff on blocked responses."""
+        min_delay = settings.get("DOWNLOAD_DELAY", 0)
+        max_delay = settings.get("AUTOTHROTTLE_MAX_DELAY", 60.0)
+        if is_blocked(status, body):
+            stats["throttle/blocked_responses"] = stats.get("throttle/blocked_responses", 0) + 1
+            slot.delay = min(max_delay, max(slot.delay, 1.0) * settings.get("BACKOFF_FACTOR", 2.0))
+            logger.warning(f"Blocked response ({status}), backing off to {slot.delay:.1f}s")
+            return
+        if status != 200:
+            return
+        target_delay = latency / settings.get("AUTOTHROTTLE_TARGET_CONCURRENCY", 1.0)
+        new_delay = max(target_delay, (slot.delay + target_delay) / 2.0)
+        slot.delay = min(max(min_delay, new_delay), max_delay)
@@ -0,0 +1,59 @@
+import os
+
+import scrapy
+
+from src.scrapers.search_spider import SearchSpider
+from src.scrapers.throttle import looks_blocked
+
+
+class DetailSpider(scrapy.Spider):
+    """Fetches the product-detail pages of a list of products (dicts with "ProductKey" and "url").
+
+    Runs with a bounded number of concurrent requests per domain and an on-disk HTTP cache
+    (see TtlRevalidatePolicy). Each page becomes a feed item with the product key, a `status`
+    ("ok", "blocked" or "failed") and, for "ok" pages, the HTML.
+    """
+
+    name = "product_detail"
+    custom_settings = {
+        **SearchSpider.custom_settings,
+        "ROBOTSTXT_OBEY": False,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 2,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 2.0,
+        "HTTPCACHE_ENABLED": True,
+        # Scrapy would put a relative cache dir under .scrapy/
+        "HTTPCACHE_DIR": os.path.abspath("./temp/httpcache"),
+        "HTTPCACHE_GZIP": True,
+        "HTTPCACHE_POLICY": "src.scrapers.http_cache.TtlRevalidatePolicy",
+        # Store pages even when the retailer sends no-cache; they are revalidated instead of re-downloaded
+        "HTTPCACHE_ALWAYS_STORE": True,
+        "HTTPCACHE_EXPIRATION_SECS": 0,
+        "HTTPCACHE_TTL": 3 * 24 * 60 * 60,
+    }
+
+    def __init__(self, products=None, feed_uri="details.json", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.feed_uri = feed_uri
+        self.products = products or []
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        for product in self.products:
+            yield scrapy.Request(product["url"], callback=self.parse, errback=self.page_failed,
+                                 cb_kwargs={"product_key": product["ProductKey"]})
+
+    def parse(self, response, product_key=None):
+        if looks_blocked(response):
+            self.crawler.stats.inc_value("details/blocked")
+            yield {"ProductKey": product_key, "url": response.url, "status": "blocked"}
+            return
+        self.crawler.stats.inc_value("details/ok")
+        yield {"ProductKey": product_key, "url": response.url, "status": "ok", "html": response.text}
+
+    def page_failed(self, failure):
+        request = failure.request
+        self.crawler.stats.inc_value("details/failed")
+        yield {"ProductKey": request.cb_kwargs.get("product_key"), "url": request.url, "status": "failed"}
@@ -0,0 +1,50 @@
+import json
+import os
+
+
+class ExtractionPipeline:
+    """Scrapy item pipeline that writes the products of each page as it arrives.
+
+    Only active when the spider was started with an `extractor` argument (streaming mode);
+    otherwise page items pass through untouched. Product rows are appended to the spider's
+    `products_uri` as JSON lines, and the page item is reduced to a small summary unless
+    `archive_html` is set.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.products_file = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def open_spider(self, spider=None):
+        spider = self.crawler.spider
+        if getattr(spider, "extractor", None) is not None:
+            directory = os.path.dirname(spider.products_uri)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.products_file = open(spider.products_uri, "w", encoding="utf-8")
+
+    def close_spider(self, spider=None):
+        if self.products_file is not None:
+            self.products_file.close()
+
+    def process_item(self, item, spider=None):
+        # Failed pages carry no HTML, they are passed on for the retry queue
+        if self.products_file is None or "html" not in item:
+            return item
+
+        spider = self.crawler.spider
+        # SearchSpider extracts from the document it already parsed; other spiders only hand over the HTML
+        products = item["products"] if "products" in item else \
+            spider.extractor.parse_products(item["html"], base_url=spider.products_base_url)
+        for product in products:
+            self.products_file.write(json.dumps(product, ensure_ascii=False) + "\n")
+
+        summary = {"page_number": item["page_number"], "url": item.get("url"), "status": item.get("status", "ok"),
+                   "product_count": len(products)}
+        if getattr(spider, "archive_html", True):
+            summary["html"] = item["html"]
+        return summary
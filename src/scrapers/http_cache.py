@@ -0,0 +1,34 @@
+import time
+
+from scrapy.extensions.httpcache import RFC2616Policy
+
+from src.scrapers.throttle import looks_blocked
+
+
+class TtlRevalidatePolicy(RFC2616Policy):
+    """HTTP cache policy for product-detail pages.
+
+    A cached page younger than HTTPCACHE_TTL seconds is used without contacting the retailer.
+    Older pages (and pages the retailer marks no-cache) are revalidated with If-None-Match /
+    If-Modified-Since, so an unchanged page costs a 304 instead of a full download.
+    Blocked (captcha / rate-limit) responses are never cached.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.ttl = settings.getint("HTTPCACHE_TTL", 0)
+
+    def should_cache_response(self, response, request):
+        return not looks_blocked(response) and super().should_cache_response(response, request)
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        now = time.time()
+        # The filesystem storage records when the page was stored; fall back to the Date header
+        stored_at = request.meta.get("cache_timestamp")
+        age = now - stored_at if stored_at else self._compute_current_age(cachedresponse, request, now)
+        if age < self.ttl:
+            return True
+        if super().is_cached_response_fresh(cachedresponse, request):
+            return True
+        self._set_conditional_validators(request, cachedresponse)
+        return False
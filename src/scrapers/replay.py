@@ -0,0 +1,98 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.storage.page_store import PageStore
+
+CAPTCHA_PAGE = (
+    "<html><head><title>Robot Check</title></head><body>"
+    '<form action="/errors/validateCaptcha"><input name="field-keywords"></form>'
+    "</body></html>"
+)
+
+
+class ReplayServer:
+    """Local HTTP stand-in for the retailers, serving archived pages from the PageStore.
+
+    Spiders started with `replay_url` fetch `<replay_url>/page?url=<original url>` instead of the
+    retailer, so the whole crawl path (scheduler, throttling, retries, feed export) runs for real.
+    Each response is delayed by `latency` plus up to `jitter` seconds; a fraction `error_rate` of
+    requests fails with 503 and a fraction `captcha_rate` gets a captcha page. URLs that are not in
+    the archive return 404.
+    """
+
+    def __init__(self, retailer=None, store_root="./temp/page_store", latency=0.0, jitter=0.0,
+                 error_rate=0.0, captcha_rate=0.0, seed=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.captcha_rate = captcha_rate
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "served": 0, "errors": 0, "captchas": 0, "missing": 0}
+        self._lock = threading.Lock()
+
+        # Latest archived version of every URL; blobs are read lazily by the handler threads
+        self.page_store = PageStore(store_root)
+        self.hashes = {page["url"]: page["content_hash"] for page in self.page_store.iter_pages(retailer=retailer) if page["url"]}
+        self.page_store.close()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"📼 Replaying {len(self.hashes)} archived pages at {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        print(f"📼 Replay server stopped: {self.stats}")
+
+    def respond(self, url):
+        """Pick the (status, html) answer for an original page URL, applying latency and injected faults."""
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        time.sleep(delay)
+
+        if roll < self.error_rate:
+            outcome, status, html = "errors", 503, "<html><body>Service Unavailable</body></html>"
+        elif roll < self.error_rate + self.captcha_rate:
+            outcome, status, html = "captchas", 200, CAPTCHA_PAGE
+        elif url in self.hashes:
+            outcome, status, html = "served", 200, self.page_store.load_html(self.hashes[url])
+        else:
+            outcome, status, html = "missing", 404, "<html><body>Not archived</body></html>"
+        with self._lock:
+            self.stats[outcome] += 1
+        return status, html
+
+    def _handler_class(self):
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = parse_qs(urlparse(self.path).query).get("url", [""])[0]
+                status, html = server.respond(url)
+                body = html.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReplayHandler
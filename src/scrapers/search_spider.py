@@ -0,0 +1,145 @@
+from urllib.parse import quote, urlparse
+
+import scrapy
+from scrapy.downloadermiddlewares.retry import get_retry_request
+
+from src.scrapers.throttle import looks_blocked
+
+
+class SearchSpider(scrapy.Spider):
+    """Base class of the retailer search spiders.
+
+    Result pages are requested one after another instead of precomputing pages 1..max_pages,
+    so pagination stops as soon as a page has no product cards or shows the last-page marker.
+    Subclasses provide `page_url(page)`, `card_selector` and optionally `last_page_selector`.
+
+    Every fetched page becomes a feed item with a `status`: "ok", "blocked" (captcha / robot
+    check), "empty" (no product cards on the first page) or "failed" (HTTP or network error
+    after Scrapy's retries). Blocked and empty pages are retried in-crawl first; only "ok"
+    items carry the page HTML and, in streaming mode (started with an `extractor`), its products.
+    Passing `retry_pages` (dicts with "page_number" and "url") fetches just those pages instead
+    of starting from page 1, and `replay_url` sends every request to a local ReplayServer while
+    keeping the retailer's URL in the items.
+    """
+
+    custom_settings = {
+        "USER_AGENT": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                      "AppleWebKit/537.36 (KHTML, like Gecko) "
+                      "Chrome/108.0.0.0 Safari/537.36",
+        # Lower bound of the per-domain delay; AutoThrottle adapts it from observed latency
+        "DOWNLOAD_DELAY": 0.5,
+        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_START_DELAY": 2,
+        "AUTOTHROTTLE_MAX_DELAY": 30,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 1.0,
+        # Backs a domain off further when it answers with 429/503 or a captcha page
+        "DOWNLOADER_MIDDLEWARES": {
+            "src.scrapers.throttle.AdaptiveBackoffMiddleware": 560,
+            # Shared per-domain request budget across processes, see RateBudgetMiddleware
+            "src.scrapers.throttle.RateBudgetMiddleware": 950,
+        },
+        # Pass-through unless the spider is started with an extractor (streaming mode)
+        "ITEM_PIPELINES": {
+            "src.scrapers.extraction_pipeline.ExtractionPipeline": 300,
+        },
+        "FEEDS": {
+            # Resolved from the spider's feed_uri attribute, so concurrent crawls can write to separate files
+            "%(feed_uri)s": {
+                "format": "json",
+                "encoding": "utf-8",
+            },
+        },
+    }
+
+    card_selector = None
+    last_page_selector = None
+
+    def __init__(self, search_term="", max_pages=1, feed_uri="scraped_data.json", retry_pages=None,
+                 replay_url=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.feed_uri = feed_uri
+        self.search_term = search_term
+        self.max_pages = int(max_pages)
+        self.retry_pages = retry_pages or []
+        self.replay_url = replay_url
+
+    def page_url(self, page):
+        raise NotImplementedError
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        if self.retry_pages:
+            for page in self.retry_pages:
+                yield self.page_request(int(page["page_number"]), page["url"])
+            return
+        # Only the first page is known up front; parse() follows the pagination from there
+        yield self.page_request(1)
+
+    def page_request(self, page_number, url=None):
+        page_url = url or self.page_url(page_number)
+        fetch_url, meta = page_url, {}
+        if self.replay_url:
+            # Throttle per retailer domain as in a live crawl, not per local server
+            fetch_url = f"{self.replay_url}/page?url={quote(page_url, safe='')}"
+            meta = {"page_url": page_url, "download_slot": urlparse(page_url).netloc}
+        return scrapy.Request(fetch_url, callback=self.parse, errback=self.page_failed, meta=meta,
+                              cb_kwargs={"page_number": page_number}, dont_filter=url is not None)
+
+    def parse(self, response, page_number=1):
+        """Yield the raw HTML of a search results page and request the next one if there is one."""
+        self.logger.info(f"Scraping {self.name} page {page_number} for '{self.search_term}'")
+        # The originally requested URL, so a retry does not start from a captcha redirect
+        url = response.meta.get("page_url") or response.meta.get("redirect_urls", [response.url])[0]
+        status = self.page_status(response, page_number)
+        if status != "ok":
+            retry_request = get_retry_request(response.request, spider=self, reason=f"{status}_page")
+            if retry_request is not None:
+                yield retry_request
+                return
+            self.logger.warning(f"Page {page_number} is {status}, giving up on it for this run")
+            self.crawler.stats.inc_value(f"pages/{status}")
+            yield {"page_number": str(page_number), "url": url, "status": status}
+            return
+
+        self.crawler.stats.inc_value("pages/ok")
+        item = {"page_number": str(page_number), "url": url, "status": status, "html": response.text}
+        extractor = getattr(self, "extractor", None)
+        if extractor is not None:
+            # Streaming mode: extract from the tree parsel already built for the page checks above,
+            # so each page is parsed once; ExtractionPipeline writes the products
+            item["products"] = extractor.extract_products(response.selector.root, base_url=self.products_base_url)
+        yield item
+
+        if page_number >= self.max_pages or self.is_last_page(response, page_number):
+            return
+        yield self.page_request(page_number + 1)
+
+    def page_failed(self, failure):
+        """Errback: record pages that failed with an HTTP or network error after Scrapy's own retries."""
+        request = failure.request
+        response = getattr(failure.value, "response", None)
+        reason = f"http_{response.status}" if response is not None else failure.type.__name__
+        self.logger.warning(f"Page {request.meta.get('page_url', request.url)} failed: {reason}")
+        self.crawler.stats.inc_value("pages/failed")
+        yield {"page_number": str(request.cb_kwargs.get("page_number", 1)), "url": request.meta.get("page_url", request.url),
+               "status": "failed", "reason": reason}
+
+    def page_status(self, response, page_number):
+        if looks_blocked(response):
+            return "blocked"
+        # Zero cards on the first page usually means a soft block rather than a search without results
+        if page_number == 1 and not response.css(self.card_selector):
+            return "empty"
+        return "ok"
+
+    def is_last_page(self, response, page_number):
+        if not response.css(self.card_selector):
+            self.logger.info(f"No product cards on page {page_number}, stopping pagination")
+            return True
+        if self.last_page_selector and response.css(self.last_page_selector):
+            self.logger.info(f"Page {page_number} is the last results page")
+            return True
+        return False
@@ -0,0 +1,95 @@
+import logging
+
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet.task import deferLater
+
+from src.storage.rate_budget import RateBudget, budget_domain
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean the retailer is rate limiting or challenging us
+BLOCK_STATUSES = {429, 503}
+BLOCK_MARKERS = (b"/errors/validatecaptcha", b"robot check", b"api-services-support@amazon.com")
+
+
+def looks_blocked(response):
+    """Cheap check for rate-limit statuses and captcha / robot-check pages."""
+    return is_blocked(response.status, response.body)
+
+
+def is_blocked(status, body):
+    if status in BLOCK_STATUSES:
+        return True
+    head = body[:50000].lower()
+    return any(marker in head for marker in BLOCK_MARKERS)
+
+
+class AdaptiveBackoffMiddleware:
+    """Downloader middleware that complements AutoThrottle with error/captcha-driven backoff.
+
+    AutoThrottle tunes each domain's delay from observed latency, but a fast captcha page
+    would make it speed up. Whenever a response looks blocked, this multiplies the delay of
+    that domain's download slot by BACKOFF_FACTOR (capped at AUTOTHROTTLE_MAX_DELAY);
+    AutoThrottle then brings it back down as healthy responses come in.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.max_delay = crawler.settings.getfloat("AUTOTHROTTLE_MAX_DELAY", 60.0)
+        self.backoff_factor = crawler.settings.getfloat("BACKOFF_FACTOR", 2.0)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_response(self, request, response, spider=None):
+        if not looks_blocked(response):
+            return response
+
+        self.crawler.stats.inc_value("throttle/blocked_responses")
+        slot_key = request.meta.get("download_slot")
+        slot = self.crawler.engine.downloader.slots.get(slot_key)
+        if slot is not None:
+            slot.delay = min(self.max_delay, max(slot.delay, 1.0) * self.backoff_factor)
+            logger.warning(f"Blocked response from {slot_key} ({response.status}), backing off to {slot.delay:.1f}s")
+        return response
+
+
+class RateBudgetMiddleware:
+    """Downloader middleware that holds requests back until the shared per-domain rate budget has a token.
+
+    Only active for spiders started with `rate_budgets` (requests per minute per retailer domain,
+    e.g. {"amazon.de": 20}). The budgets live in one SQLite file (`rate_budget_db`), so all crawls
+    and worker processes using it together stay under each retailer's request ceiling. Runs after
+    the HTTP cache, so cache hits don't spend budget.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.budget = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    async def process_request(self, request, spider=None):
+        spider = self.crawler.spider
+        budgets = getattr(spider, "rate_budgets", None)
+        if not budgets:
+            return None
+        domain = budget_domain(request.meta.get("download_slot") or urlparse_cached(request).netloc)
+        rate = budgets.get(domain)
+        if not rate:
+            return None
+
+        if self.budget is None:
+            self.budget = RateBudget(getattr(spider, "rate_budget_db", "./temp/rate_budget.sqlite"))
+        # Imported lazily so that Scrapy gets to install its own reactor first
+        from twisted.internet import reactor
+        while True:
+            wait = self.budget.acquire(domain, rate)
+            if wait <= 0:
+                return None
+            self.crawler.stats.inc_value("throttle/budget_waits")
+            await maybe_deferred_to_future(deferLater(reactor, wait, lambda: None))
@@ -0,0 +1,33 @@
+import json
+import os
+
+
+class DebugSink:
+    """Buffered newline-delimited JSON dump of extracted product rows, for inspecting extractor output.
+
+    Rows are kept in memory and appended to `path` once `batch_size` rows are buffered
+    (or on close), so the extraction loop itself does no file I/O.
+    """
+
+    def __init__(self, path, batch_size=5000):
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+
+    def add(self, products):
+        self.buffer.extend(products)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(product, ensure_ascii=False) + "\n" for product in self.buffer))
+        self.buffer = []
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,130 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+class JobQueue:
+    """SQLite job queue of ScraperPipeline configs, shared by the worker processes of a sweep.
+
+    Jobs are unique per sweep and config, so enqueueing a sweep again only adds missing configs
+    and never re-runs completed ones. A claimed job holds a lease that its worker renews while the
+    job runs; if the worker crashes the lease expires and another worker picks the job up again.
+    Only the worker holding a job can complete or fail it.
+    """
+
+    def __init__(self, db_path="./temp/jobs.sqlite", max_attempts=3):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_attempts = max_attempts
+        # Autocommit mode: claims use explicit BEGIN IMMEDIATE transactions
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                sweep TEXT NOT NULL,
+                config_hash TEXT NOT NULL,
+                retailer TEXT NOT NULL,
+                config TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                run_id TEXT,
+                error TEXT,
+                updated_at TEXT,
+                UNIQUE (sweep, config_hash)
+            );
+            CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (sweep, status, lease_until);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, configs, sweep):
+        """Add configs (dicts with a "Retailer" key) to a sweep; returns the number of new jobs."""
+        added = 0
+        with self.conn:
+            for config in configs:
+                payload = json.dumps(config, sort_keys=True, ensure_ascii=False)
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO jobs (sweep, config_hash, retailer, config, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (sweep, hashlib.sha1(payload.encode("utf-8")).hexdigest(), config["Retailer"], payload, _now()),
+                )
+                added += cursor.rowcount
+        return added
+
+    def claim(self, sweep, worker, lease_seconds=3600):
+        """Atomically take the next pending job (or one whose worker's lease expired); None if there is none.
+
+        Expired jobs without attempts left are marked failed on the way.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A worker that crashed on the job's last attempt leaves it running; it can't be claimed again
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', lease_until = NULL, updated_at = ? "
+                "WHERE sweep = ? AND status = 'running' AND lease_until < ? AND attempts >= ?",
+                (_now(), sweep, now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                "SELECT id, config FROM jobs WHERE sweep = ? AND attempts < ? "
+                "AND (status = 'pending' OR (status = 'running' AND lease_until < ?)) ORDER BY id LIMIT 1",
+                (sweep, self.max_attempts, now),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (worker, now + lease_seconds, _now(), row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return (row[0], json.loads(row[1])) if row is not None else None
+
+    def renew(self, job_id, worker, lease_seconds=3600):
+        """Extend the lease of a running job; False if the worker no longer holds it."""
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + lease_seconds, _now(), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, run_id=None):
+        """Mark the job done; False (and no change) if its lease was lost to another worker."""
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'done', run_id = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (run_id, _now(), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        """Put the job back in the queue, or mark it failed once it has used all its attempts.
+
+        Like complete, only the worker holding the job can do so; returns False otherwise.
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+                "error = ?, lease_until = NULL, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (self.max_attempts, str(error), _now(), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def progress(self, sweep):
+        """Number of jobs per status in a sweep."""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs WHERE sweep = ? GROUP BY status", (sweep,)))
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,165 @@
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import uuid
+import zlib
+
+from src.extractors.engine import ExtractionEngine
+
+
+class PageStore:
+    """Compressed, content-addressed archive of scraped HTML pages.
+
+    Each page is stored once as a gzip blob named by the SHA-256 of its HTML. A SQLite index maps
+    retailer / search term / page number / fetch time (and the run that fetched it) to the blob, and caches the products each
+    extractor version produced for it, so re-extraction only re-parses pages whose extractor changed.
+    """
+
+    def __init__(self, root="./temp/page_store"):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                retailer TEXT NOT NULL,
+                search_term TEXT NOT NULL,
+                page_number TEXT,
+                url TEXT,
+                fetched_at TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                run_id TEXT,
+                reextracted_with TEXT
+            );
+            CREATE INDEX IF NOT EXISTS pages_lookup ON pages (retailer, search_term, fetched_at);
+            CREATE TABLE IF NOT EXISTS extractions (
+                content_hash TEXT NOT NULL,
+                extractor TEXT NOT NULL,
+                version TEXT NOT NULL,
+                products BLOB NOT NULL,
+                PRIMARY KEY (content_hash, extractor)
+            );
+        """)
+        # Archives created before pages were linked to their run, or before re-extractions were recorded
+        columns = [column[1] for column in self.conn.execute("PRAGMA table_info(pages)")]
+        for column in ("run_id", "reextracted_with"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+
+    def close(self):
+        self.conn.close()
+
+    def _blob_path(self, content_hash):
+        return os.path.join(self.blob_dir, content_hash[:2], f"{content_hash}.html.gz")
+
+    def add_page(self, html, retailer, search_term, page_number=None, url=None, fetched_at=None, run_id=None):
+        """Store a page (deduplicated by content) and index it. Returns the content hash."""
+        data = html.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(content_hash)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            # Write to a temp file first so a crash never leaves a truncated blob behind
+            tmp_path = f"{blob_path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(data))
+            os.replace(tmp_path, blob_path)
+
+        fetched_at = fetched_at or datetime.datetime.now().isoformat(timespec="seconds")
+        self.conn.execute(
+            "INSERT INTO pages (retailer, search_term, page_number, url, fetched_at, content_hash, run_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (retailer, search_term, page_number, url, fetched_at, content_hash, run_id),
+        )
+        return content_hash
+
+    def add_pages(self, pages, retailer, search_term, run_id=None):
+        """Archive the page items of a crawl feed (dicts with an "html" key); they share one fetch time."""
+        fetched_at = datetime.datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            for page in pages:
+                if "html" in page:
+                    self.add_page(page["html"], retailer, search_term, page.get("page_number"), page.get("url"), fetched_at, run_id)
+
+    def load_html(self, content_hash):
+        with open(self._blob_path(content_hash), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+    def iter_pages(self, retailer=None, search_term=None, since=None, until=None):
+        """Yield index rows (as dicts) matching the filters, oldest first."""
+        query = "SELECT id, retailer, search_term, page_number, url, fetched_at, content_hash, run_id, reextracted_with FROM pages WHERE 1=1"
+        params = []
+        for clause, value in (("retailer = ?", retailer), ("search_term = ?", search_term),
+                              ("fetched_at >= ?", since), ("fetched_at < ?", until)):
+            if value is not None:
+                query += f" AND {clause}"
+                params.append(value)
+        cursor = self.conn.execute(query + " ORDER BY fetched_at, id", params)
+        columns = [c[0] for c in cursor.description]
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+    def latest_fetch(self, retailer, search_term):
+        """The pages of the most recent archived fetch, as feed items ("page_number", "url", "status", "html")."""
+        row = self.conn.execute("SELECT MAX(fetched_at) FROM pages WHERE retailer = ? AND search_term = ?",
+                                (retailer, search_term)).fetchone()
+        if row[0] is None:
+            return []
+        return [{"page_number": page["page_number"], "url": page["url"], "status": "ok", "html": self.load_html(page["content_hash"])}
+                for page in self.iter_pages(retailer, search_term, since=row[0]) if page["fetched_at"] == row[0]]
+
+    def get_cached_products(self, content_hash, extractor):
+        """Return the products cached for this page and extractor version, or None if stale/missing."""
+        row = self.conn.execute(
+            "SELECT version, products FROM extractions WHERE content_hash = ? AND extractor = ?",
+            (content_hash, extractor.name),
+        ).fetchone()
+        if row is None or row[0] != extractor.version:
+            return None
+        return json.loads(zlib.decompress(row[1]))
+
+    def cache_products(self, content_hash, extractor, products):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO extractions (content_hash, extractor, version, products) VALUES (?, ?, ?, ?)",
+            (content_hash, extractor.name, extractor.version,
+             zlib.compress(json.dumps(products, ensure_ascii=False).encode("utf-8"))),
+        )
+
+    def re_extract(self, extractor, base_url, workers=1, changed_only=False, **filters):
+        """Yield (page, products) for archived pages, only re-parsing pages whose extractor version changed.
+
+        Every archived fetch is yielded on its own, oldest first: the page dict carries its `fetched_at`
+        and `run_id` (None for pages archived before runs were recorded), so callers can rebuild the
+        observations of each past run instead of merging them. With `changed_only`, pages already
+        re-extracted with this extractor version (see mark_re_extracted) are skipped.
+        """
+        pages = list(self.iter_pages(**filters))
+        if changed_only:
+            pages = [page for page in pages if page["reextracted_with"] != _extractor_tag(extractor)]
+        stale_hashes = list(dict.fromkeys(
+            page["content_hash"] for page in pages if self.get_cached_products(page["content_hash"], extractor) is None
+        ))
+
+        # Parse stale pages (possibly across processes) and cache the results as they come back
+        engine = ExtractionEngine(extractor, base_url, workers=workers)
+        html_pages = (self.load_html(content_hash) for content_hash in stale_hashes)
+        with self.conn:
+            for content_hash, products in zip(stale_hashes, engine.iter_pages(html_pages)):
+                self.cache_products(content_hash, extractor, products)
+        print(f"♻️ Re-extracted {len(stale_hashes)} archived pages with {extractor.name} v{extractor.version}")
+
+        for page in pages:
+            yield page, self.get_cached_products(page["content_hash"], extractor)
+
+    def mark_re_extracted(self, pages, extractor):
+        """Record that the rows of these pages were written with this extractor version."""
+        with self.conn:
+            self.conn.executemany("UPDATE pages SET reextracted_with = ? WHERE id = ?",
+                                  ((_extractor_tag(extractor), page["id"]) for page in pages))
+
+
+def _extractor_tag(extractor):
+    return f"{extractor.name}:{extractor.version}"
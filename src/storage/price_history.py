@@ -0,0 +1,163 @@
+import datetime
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from src.processors.product_identity import product_key
+
+
+def _timestamp(value):
+    """Unix seconds of a datetime, date, ISO string or number; a timedelta counts back from now"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime.timedelta):
+        return int(time.time() - value.total_seconds())
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return int(value.timestamp())
+
+
+def _in(column, values):
+    return f"{column} IN ({', '.join('?' for _ in values)})"
+
+
+class PriceHistory:
+    """Price observations of every run, indexed for per-product and time-window queries.
+
+    Products are stored once per retailer (keyed by normalized product identity) together with their
+    latest price, so "latest price per retailer" is a primary-key lookup. Observations reference
+    the product by integer id and are clustered by (product, time) in a WITHOUT ROWID table: the
+    time series or a window aggregate of a product is a single index range scan, even with
+    millions of observations. Times are stored as Unix seconds.
+    """
+
+    def __init__(self, db_path="./results/price_history.sqlite"):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS products (
+                product_id INTEGER PRIMARY KEY,
+                retail TEXT NOT NULL,
+                product_key TEXT NOT NULL,
+                title TEXT,
+                link TEXT,
+                last_observed_at INTEGER,
+                last_price_minor INTEGER,
+                last_currency TEXT,
+                UNIQUE (product_key, retail)
+            );
+            CREATE INDEX IF NOT EXISTS products_retail ON products (retail, product_key);
+            CREATE TABLE IF NOT EXISTS observations (
+                product_id INTEGER NOT NULL,
+                observed_at INTEGER NOT NULL,
+                price_minor INTEGER NOT NULL,
+                currency TEXT,
+                run_id TEXT,
+                PRIMARY KEY (product_id, observed_at)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS observations_time ON observations (observed_at);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, df, run, observed_at=None):
+        """Store the priced products of a run; returns the number of observations written.
+
+        A product seen twice at the same time keeps the later row.
+        """
+        if df.empty or "PriceMinor" not in df.columns:
+            return 0
+        observed_at = _timestamp(observed_at) or int(time.time())
+        priced = df[df["PriceMinor"].notna()]
+        keys = priced["Link"].map(product_key, na_action="ignore")
+        rows = []
+        for key, title, link, price, currency in zip(
+                keys, priced["Title"] if "Title" in priced.columns else [None] * len(priced), priced["Link"],
+                priced["PriceMinor"], priced["Currency"] if "Currency" in priced.columns else [None] * len(priced)):
+            if isinstance(key, str):
+                rows.append((run.retail, key, None if pd.isna(title) else title, link, observed_at, int(price),
+                             None if pd.isna(currency) else currency))
+
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO products (retail, product_key, title, link, last_observed_at, last_price_minor, last_currency)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (product_key, retail) DO UPDATE SET
+                    title = excluded.title, link = excluded.link, last_observed_at = excluded.last_observed_at,
+                    last_price_minor = excluded.last_price_minor, last_currency = excluded.last_currency
+                WHERE excluded.last_observed_at >= products.last_observed_at
+            """, rows)
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO observations (product_id, observed_at, price_minor, currency, run_id)
+                SELECT product_id, ?, ?, ?, ? FROM products WHERE product_key = ? AND retail = ?
+            """, ((observed_at, price, currency, run.run_id, key, retailer)
+                  for retailer, key, _, _, observed_at, price, currency in rows))
+        return len(rows)
+
+    def _filters(self, product_keys, retailers, since=None, until=None):
+        clauses, params = [], []
+        if product_keys is not None:
+            product_keys = [product_keys] if isinstance(product_keys, str) else list(product_keys)
+            clauses.append(_in("p.product_key", product_keys))
+            params += product_keys
+        if retailers is not None:
+            retailers = [retailers] if isinstance(retailers, str) else list(retailers)
+            clauses.append(_in("p.retail", retailers))
+            params += retailers
+        for clause, value in (("o.observed_at >= ?", since), ("o.observed_at < ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(_timestamp(value))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _query(self, sql, params, time_columns):
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        for column in time_columns:
+            df[column] = pd.to_datetime(df[column], unit="s")
+        return df
+
+    def time_series(self, product_keys, retailers=None, since=None, until=None):
+        """Every observation of the products, oldest first.
+
+        `since` / `until` take datetimes, dates, ISO strings or a timedelta back from now.
+        Pass the ProductKeys of a ProductMatcher group to follow one product across retailers.
+        """
+        where, params = self._filters(product_keys, retailers, since, until)
+        return self._query(f"""
+            SELECT p.retail AS Retail, p.product_key AS ProductKey, o.observed_at AS ObservedAt,
+                   o.price_minor AS PriceMinor, o.currency AS Currency, o.run_id AS RunId
+            FROM products p JOIN observations o ON o.product_id = p.product_id{where}
+            ORDER BY o.observed_at, p.retail
+        """, params, ["ObservedAt"])
+
+    def price_stats(self, product_keys=None, retailers=None, since=None, until=None):
+        """Min/max/average price and observation count per product, retailer and currency within the window,
+        e.g. price_stats(["B0..."], since=timedelta(days=90))."""
+        where, params = self._filters(product_keys, retailers, since, until)
+        return self._query(f"""
+            SELECT p.retail AS Retail, p.product_key AS ProductKey, o.currency AS Currency,
+                   MIN(o.price_minor) AS MinPriceMinor, MAX(o.price_minor) AS MaxPriceMinor,
+                   AVG(o.price_minor) AS AvgPriceMinor, COUNT(*) AS Observations,
+                   MIN(o.observed_at) AS FirstObservedAt, MAX(o.observed_at) AS LastObservedAt
+            FROM products p JOIN observations o ON o.product_id = p.product_id{where}
+            GROUP BY p.product_id, o.currency
+            ORDER BY p.retail, p.product_key
+        """, params, ["FirstObservedAt", "LastObservedAt"])
+
+    def latest_prices(self, product_keys=None, retailers=None):
+        """The most recent price of each product at each retailer."""
+        where, params = self._filters(product_keys, retailers)
+        return self._query(f"""
+            SELECT p.retail AS Retail, p.product_key AS ProductKey, p.title AS Title, p.link AS Link,
+                   p.last_price_minor AS PriceMinor, p.last_currency AS Currency, p.last_observed_at AS ObservedAt
+            FROM products p{where}
+            ORDER BY p.retail, p.product_key
+        """, params, ["ObservedAt"])
@@ -0,0 +1,52 @@
+import os
+import sqlite3
+import time
+
+
+def budget_domain(netloc):
+    """Budgets are per retailer domain: www.amazon.de and amazon.de share one"""
+    netloc = netloc.lower().split(":")[0]
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class RateBudget:
+    """Token buckets in SQLite, shared by every crawl and worker process using the same database file.
+
+    Each domain refills at `rate` requests per minute up to `burst` tokens. `acquire` takes a token
+    and returns 0, or returns how many seconds to wait before asking again.
+    """
+
+    def __init__(self, db_path="./temp/rate_budget.sqlite"):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                domain TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def acquire(self, domain, rate, burst=1.0):
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT tokens, updated_at FROM buckets WHERE domain = ?", (domain,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate / 60.0)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) * 60.0 / rate
+            self.conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (domain, tokens, now))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return wait
@@ -0,0 +1,107 @@
+import datetime
+import os
+import sqlite3
+
+
+class RetryQueue:
+    """Persistent queue of search pages that failed (blocked, empty or errored), plus per-run page health.
+
+    Failed pages are keyed by retailer / search term / URL. Each failure pushes the page's next
+    attempt back exponentially (base_delay * 2^(attempts - 1), capped at max_delay), so a later
+    retry run re-fetches only the pages that are due instead of the whole search.
+    """
+
+    def __init__(self, db_path="./temp/retry_queue.sqlite", base_delay=15 * 60, max_delay=24 * 60 * 60, max_attempts=5):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS failed_pages (
+                retailer TEXT NOT NULL,
+                search_term TEXT NOT NULL,
+                url TEXT NOT NULL,
+                page_number TEXT,
+                reason TEXT,
+                attempts INTEGER NOT NULL,
+                next_attempt_at TEXT NOT NULL,
+                PRIMARY KEY (retailer, search_term, url)
+            );
+            CREATE INDEX IF NOT EXISTS failed_pages_due ON failed_pages (retailer, search_term, next_attempt_at);
+            CREATE TABLE IF NOT EXISTS run_health (
+                run_id TEXT PRIMARY KEY,
+                retailer TEXT NOT NULL,
+                search_term TEXT NOT NULL,
+                finished_at TEXT NOT NULL,
+                pages_ok INTEGER NOT NULL,
+                pages_failed INTEGER NOT NULL,
+                success_rate REAL
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def add_failures(self, pages, retailer, search_term, now=None):
+        """Enqueue failed page items (dicts with "url", "page_number" and "status"/"reason")."""
+        now = now or datetime.datetime.now()
+        with self.conn:
+            for page in pages:
+                row = self.conn.execute(
+                    "SELECT attempts FROM failed_pages WHERE retailer = ? AND search_term = ? AND url = ?",
+                    (retailer, search_term, page["url"]),
+                ).fetchone()
+                attempts = (row[0] if row else 0) + 1
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+                next_attempt_at = (now + datetime.timedelta(seconds=delay)).isoformat(timespec="seconds")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO failed_pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (retailer, search_term, page["url"], page.get("page_number"),
+                     page.get("reason") or page.get("status"), attempts, next_attempt_at),
+                )
+
+    def resolve(self, pages, retailer, search_term):
+        """Drop pages that have now been fetched successfully."""
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM failed_pages WHERE retailer = ? AND search_term = ? AND url = ?",
+                ((retailer, search_term, page["url"]) for page in pages if page.get("url")),
+            )
+
+    def due(self, retailer, search_term, now=None):
+        """Failed pages whose backoff has elapsed and that have attempts left."""
+        now = (now or datetime.datetime.now()).isoformat(timespec="seconds")
+        rows = self.conn.execute(
+            "SELECT page_number, url, reason, attempts FROM failed_pages "
+            "WHERE retailer = ? AND search_term = ? AND next_attempt_at <= ? AND attempts < ? "
+            "ORDER BY CAST(page_number AS INTEGER)",
+            (retailer, search_term, now, self.max_attempts),
+        ).fetchall()
+        return [{"page_number": page_number, "url": url, "reason": reason, "attempts": attempts}
+                for page_number, url, reason, attempts in rows]
+
+    def record_run(self, run_id, retailer, search_term, pages_ok, pages_failed):
+        """Store a run's page success rate and return it (None if no page was fetched)."""
+        total = pages_ok + pages_failed
+        success_rate = pages_ok / total if total else None
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO run_health VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, retailer, search_term, datetime.datetime.now().isoformat(timespec="seconds"),
+                 pages_ok, pages_failed, success_rate),
+            )
+        return success_rate
+
+    def run_health(self, retailer=None, limit=20):
+        """Most recent runs' page health, optionally for one retailer."""
+        query = "SELECT run_id, retailer, search_term, finished_at, pages_ok, pages_failed, success_rate FROM run_health"
+        params = ()
+        if retailer is not None:
+            query += " WHERE retailer = ?"
+            params = (retailer,)
+        query += " ORDER BY finished_at DESC LIMIT ?"
+        columns = ["run_id", "retailer", "search_term", "finished_at", "pages_ok", "pages_failed", "success_rate"]
+        return [dict(zip(columns, row)) for row in self.conn.execute(query, params + (limit,))]
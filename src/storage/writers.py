@@ -0,0 +1,125 @@
+import datetime
+import glob
+import os
+import uuid
+import pandas as pd
+
+from src.utils import reserve_unique_filename
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking
+    fcntl = None
+
+try:
+    import pyarrow
+except ImportError:  # optional: fastparquet can write the dataset too, without an explicit schema
+    pyarrow = None
+
+
+def conform(df, columns):
+    """Reindex rows to a dataset's fixed columns (dict of column -> dtype); None keeps them as they are."""
+    if columns is None:
+        return df
+    return df.reindex(columns=list(columns)).astype(columns)
+
+
+class ExcelWriter:
+    """One xlsx file per run (the original output), with the run metadata on a separate sheet.
+
+    The file name is reserved atomically at write time (name.xlsx, name_1.xlsx, ...), so
+    concurrent runs never write to the same file.
+    """
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = columns
+
+    def write(self, df, run):
+        path = reserve_unique_filename(self.path)
+        with pd.ExcelWriter(path) as writer:
+            conform(df, self.columns).to_excel(writer, sheet_name="Products", index=False)
+            run.to_frame().to_excel(writer, sheet_name="Run", index=False)
+        print(f"📁 Data saved to: {path}")
+
+
+class CsvWriter:
+    """Streaming CSV output; in append mode every run (or batch) adds rows to the same file.
+
+    Run metadata is appended to a `<name>_runs.csv` file next to it. With `columns`, rows are
+    written in that fixed column order, so the header written by the first run fits every later one.
+    """
+
+    def __init__(self, path, append=True, columns=None):
+        self.path = path
+        self.append = append
+        self.columns = columns
+        self.runs_path = os.path.splitext(path)[0] + "_runs.csv"
+
+    def _write(self, df, path):
+        with open(path, "a" if self.append else "w", encoding="utf-8", newline="") as f:
+            # Hold an exclusive lock so concurrent runs neither interleave rows nor both write a header
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            has_header = self.append and f.seek(0, os.SEEK_END) > 0
+            f.write(df.to_csv(header=not has_header, index=False))
+
+    def write(self, df, run):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._write(conform(df, self.columns), self.path)
+        self._write(run.to_frame(), self.runs_path)
+        print(f"📁 Data {'appended' if self.append else 'saved'} to: {self.path}")
+
+
+class ParquetWriter:
+    """Parquet dataset partitioned hive-style (e.g. retail=amazon.de/date=2026-01-31/part-....parquet).
+
+    Every write adds a new part file, so nightly runs append to one dataset instead of
+    producing separate files. Run metadata goes to `_runs/`, which dataset readers skip.
+    Requires pyarrow (or fastparquet).
+
+    Dataset readers take the schema from a single part, so with `columns` every part is written
+    with all of them, in the same order and with the same types, whichever retailer wrote it.
+    """
+
+    def __init__(self, root, columns=None):
+        self.root = root
+        self.columns = columns
+        self.schema = None
+        if columns is not None and pyarrow is not None:
+            self.schema = pyarrow.Schema.from_pandas(conform(pd.DataFrame(), columns), preserve_index=False)
+
+    def write(self, df, run):
+        directory = os.path.join(self.root, f"retail={run.retail}", f"date={run.date}")
+        runs_directory = os.path.join(self.root, "_runs")
+        os.makedirs(directory, exist_ok=True)
+        os.makedirs(runs_directory, exist_ok=True)
+        # Timestamp + random suffix: unique without probing the directory for free names
+        part_name = f"part-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(directory, part_name)
+        conform(df, self.columns).to_parquet(path, index=False, **({"schema": self.schema} if self.schema is not None else {}))
+        run.to_frame().to_parquet(os.path.join(runs_directory, f"{run.run_id}.parquet"), index=False)
+        print(f"📁 Data appended to dataset: {path}")
+
+
+def read_runs(dataset_root):
+    """Load the run metadata table of a Parquet dataset."""
+    paths = glob.glob(os.path.join(dataset_root, "_runs", "*.parquet"))
+    return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True) if paths else pd.DataFrame()
+
+
+def export_to_excel(dataset_root, output_excel, **filters):
+    """Export (a filtered slice of) the Parquet dataset to an xlsx file, e.g. retail="amazon.de"."""
+    df = pd.read_parquet(dataset_root, filters=[(key, "==", value) for key, value in filters.items()] or None)
+    # The hive partition keys come back as extra columns; they duplicate the run metadata
+    df = df.drop(columns=[column for column in ("retail", "date") if column in df.columns])
+    runs = read_runs(dataset_root)
+    if not runs.empty:
+        runs = runs[runs["RunId"].isin(df["RunId"].unique())]
+    with pd.ExcelWriter(output_excel) as writer:
+        df.to_excel(writer, sheet_name="Products", index=False)
+        runs.to_excel(writer, sheet_name="Runs", index=False)
+    print(f"📁 Data exported to: {output_excel}")
+    return output_excel
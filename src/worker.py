@@ -0,0 +1,143 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from src.retailers import RETAILERS
+from src.storage.job_queue import JobQueue
+
+DEFAULT_QUEUE = "./temp/jobs.sqlite"
+DEFAULT_RETAILERS = list(RETAILERS)
+
+
+def _run_job(config):
+    # Runs in a fresh child process per job: Scrapy's reactor can't be restarted within one process
+    from src.pipeline import ScraperPipeline
+
+    pipeline = ScraperPipeline(retailer_url=config["Retailer"], config=config)
+    pipeline.run_pipeline()
+    return pipeline.run.run_id
+
+
+def expand_configs(configs, retailers=DEFAULT_RETAILERS):
+    """Configs without a "Retailer" key are run for every retailer."""
+    expanded = []
+    for config in configs:
+        if "Retailer" in config:
+            expanded.append(config)
+        else:
+            expanded.extend({**config, "Retailer": retailer} for retailer in retailers)
+    return expanded
+
+
+class Worker:
+    """Pulls pipeline configs of a sweep from the JobQueue and runs them one by one until the sweep is drained.
+
+    Progress is checkpointed per job: a job is marked done only after its results are saved. The
+    worker renews the job's lease while it runs, and the job of a crashed worker is picked up
+    again once its lease expires. `rate_budgets` (requests per minute per retailer domain) are
+    enforced across all workers sharing the budget database.
+    """
+
+    def __init__(self, sweep, queue_path=DEFAULT_QUEUE, rate_budgets=None, lease_seconds=3600):
+        self.sweep = sweep
+        self.queue_path = queue_path
+        self.rate_budgets = rate_budgets or {}
+        self.lease_seconds = lease_seconds
+        # Leases are renewed several times per lease period, so one slow renewal never lets a lease lapse
+        self.heartbeat_seconds = max(1, lease_seconds / 3)
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+
+    def run(self):
+        queue = JobQueue(self.queue_path)
+        completed = 0
+        while True:
+            job = queue.claim(self.sweep, self.worker_id, self.lease_seconds)
+            if job is None:
+                break
+            job_id, config = job
+            if config["Retailer"] in self.rate_budgets:
+                config.setdefault("Rate_budget", self.rate_budgets[config["Retailer"]])
+
+            print(f"👷 {self.worker_id} running job {job_id}: {config}")
+            # A new process for every job; a crashing job breaks only its own pool
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                future = pool.submit(_run_job, config)
+                # Heartbeat: jobs that run longer than a lease must not be handed to a second worker
+                lease_held = True
+                while not wait([future], timeout=self.heartbeat_seconds).done:
+                    if lease_held and not queue.renew(job_id, self.worker_id, self.lease_seconds):
+                        lease_held = False
+                        print(f"⚠️ Lease of job {job_id} was lost, its result will not be recorded")
+                try:
+                    run_id = future.result()
+                except Exception as error:
+                    if queue.fail(job_id, self.worker_id, f"{type(error).__name__}: {error}"):
+                        print(f"❌ Job {job_id} failed: {error}")
+                    continue
+            if queue.complete(job_id, self.worker_id, run_id):
+                completed += 1
+            else:
+                print(f"⚠️ Job {job_id} finished after another worker took it over, not marked done")
+        queue.close()
+        print(f"✅ {self.worker_id} finished, {completed} jobs completed")
+        return completed
+
+
+def _work(sweep, queue_path, rate_budgets, lease_seconds):
+    Worker(sweep, queue_path, rate_budgets, lease_seconds).run()
+
+
+def run_workers(sweep, workers=1, queue_path=DEFAULT_QUEUE, rate_budgets=None, lease_seconds=3600):
+    """Start `workers` worker processes on this machine and wait until the sweep is drained."""
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_work, args=(sweep, queue_path, rate_budgets, lease_seconds))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coordinator/worker mode: run pipeline configs from a shared job queue.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE, help="job queue database shared by all workers")
+    parser.add_argument("--sweep", default=f"sweep-{datetime.date.today().isoformat()}",
+                        help="name of the sweep; completed jobs of a sweep are never run again")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="add the configs of a JSON file (a list of pipeline configs) to the sweep")
+    enqueue.add_argument("configs_file")
+    enqueue.add_argument("--retailers", default=",".join(DEFAULT_RETAILERS),
+                         help="retailers for configs without a Retailer key")
+
+    work = commands.add_parser("work", help="run workers until the sweep is drained")
+    work.add_argument("--workers", type=int, default=1)
+    work.add_argument("--rate-budget", action="append", default=[], metavar="DOMAIN=REQUESTS_PER_MINUTE",
+                      help="global request budget of a retailer, e.g. amazon.de=20")
+    work.add_argument("--lease", type=int, default=3600, help="seconds after which a crashed worker's job is retried")
+
+    commands.add_parser("status", help="show the number of jobs per status")
+
+    args = parser.parse_args(argv)
+    if args.command == "enqueue":
+        with open(args.configs_file, "r", encoding="utf-8") as f:
+            configs = expand_configs(json.load(f), args.retailers.split(","))
+        queue = JobQueue(args.queue)
+        added = queue.enqueue(configs, args.sweep)
+        print(f"📥 {added} new jobs added to {args.sweep} ({len(configs) - added} already queued): {queue.progress(args.sweep)}")
+        queue.close()
+    elif args.command == "work":
+        rate_budgets = {domain: float(rate) for domain, rate in (budget.split("=") for budget in args.rate_budget)}
+        run_workers(args.sweep, args.workers, args.queue, rate_budgets, args.lease)
+    else:
+        queue = JobQueue(args.queue)
+        print(f"📊 {args.sweep}: {queue.progress(args.sweep)}")
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()